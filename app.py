@@ -9,6 +9,26 @@ os.environ['GROQ_API_KEY'] = 'gsk_kjAviBycCgrdmY1Cmk5RWGdyb3FY8Oeg8iIS1FHg1dgvGA
 # Add the parent directory to Python path
 sys.path.append(str(Path(__file__).parent))
 
+from utils.chat_history import (
+    SessionRegistry,
+    make_message,
+    append_message,
+    visible_window,
+    hidden_count
+)
+
+from src.config import LLM_LATE_ANSWER_TIMEOUT, PROFILE_UI, PROFILE_DIR
+from src.rate_limiter import get_llm_limiter, LLM_BUSY_MESSAGE, ERROR_ANSWER_PREFIXES
+
+def get_session_id():
+    """Id of the current browser session, if running under streamlit"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx else None
+    except Exception:
+        return None
+
 def main():
     st.set_page_config(
         page_title="⚖️ IPC Legal Assistant",
@@ -37,6 +57,15 @@ def main():
             if st.session_state.rag:
                 st.success("✅ IPC System Ready!")
     
+    # Knowledge base still being built in the background
+    if st.session_state.rag and st.session_state.rag.bootstrap_status():
+        bootstrap = st.session_state.rag.bootstrap_status()
+        if bootstrap['state'] == 'building':
+            st.info(f"🏗️ Building the IPC search index: {bootstrap['stage'] or 'starting'} "
+                    f"({bootstrap['percent']}%). Exact section lookups work meanwhile.")
+        elif bootstrap['state'] == 'failed':
+            st.warning(f"⚠️ Building the IPC search index failed: {bootstrap['error'] or 'see server logs'}")
+    
     # Quick access buttons
     st.markdown("**Quick Access:**")
     col1, col2, col3, col4 = st.columns(4)
@@ -69,14 +98,29 @@ def main():
         if st.button("🤥 Cheating"):
             st.session_state.user_input = "cheating section 420"
     
+    # Type-ahead: jump straight to a section by number or title
+    lookup = st.text_input("🔎 Find a section", placeholder="e.g. 49, criminal breach of...", key="section_search")
+    if lookup and st.session_state.rag:
+        suggestions = st.session_state.rag.suggest_sections(lookup, limit=6)
+        if not suggestions:
+            st.caption("No matching sections.")
+        for suggestion in suggestions:
+            if st.button(suggestion['label'], key=f"suggest_{suggestion['section']}"):
+                st.session_state.section_pick = suggestion['section']
+    
     st.markdown("---")
     
+    # Process-wide registry used to release the history of idle sessions
+    @st.cache_resource
+    def get_session_registry():
+        return SessionRegistry()
+    
     # Chat interface
     if "messages" not in st.session_state:
         st.session_state.messages = [
-            {
-                "role": "assistant", 
-                "content": """
+            make_message(
+                "assistant", 
+                """
                 **Hello! I'm your AI Legal Assistant** 🤖⚖️
                 
                 I can help you with:
@@ -91,15 +135,41 @@ def main():
                 - "Rape laws in IPC"
                 - "Define theft"
                 - "Section 420 cheating"
-                """
-            }
+                """,
+                pinned=True
+            )
         ]
+    if "history_pages" not in st.session_state:
+        st.session_state.history_pages = 1
+    if "conversation" not in st.session_state:
+        # Previous turn's query and sections, reused for follow-up questions
+        st.session_state.conversation = {}
+    
+    registry = get_session_registry()
+    session_id = get_session_id()
+    if session_id:
+        if registry.touch(session_id, st.session_state.messages):
+            st.info("🕒 Earlier messages were cleared after a period of inactivity.")
+        registry.evict_idle()
     
-    # Display chat messages
-    for message in st.session_state.messages:
+    # Display only the newest page(s) of chat messages
+    earlier = hidden_count(st.session_state.messages, st.session_state.history_pages)
+    if earlier and st.button(f"⬆️ Load earlier messages ({earlier} hidden)", key="load_earlier"):
+        st.session_state.history_pages += 1
+    
+    for message in visible_window(st.session_state.messages, st.session_state.history_pages):
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
     
+    # Tell users up front when the LLM quota is under pressure
+    if get_llm_limiter().is_busy():
+        st.caption("⏳ High demand right now: answers may take longer than usual.")
+    
+    # Debug: capture a cProfile/tracemalloc dump of the next question
+    profile_next = PROFILE_UI and st.sidebar.checkbox(
+        "🔬 Profile next question", help=f"Writes a profile to {PROFILE_DIR}/"
+    )
+    
     # Chat input
     if "user_input" in st.session_state:
         user_input = st.session_state.user_input
@@ -107,9 +177,27 @@ def main():
     else:
         user_input = st.chat_input("Ask about IPC sections (1-575)...")
     
+    # A picked suggestion is answered by direct lookup, without search or LLM
+    if "section_pick" in st.session_state:
+        section = st.session_state.section_pick
+        del st.session_state.section_pick
+        request = f"Section {section}"
+        answer = st.session_state.rag.section_answer(section)
+        append_message(st.session_state.messages, "user", request)
+        append_message(st.session_state.messages, "assistant", answer)
+        # Follow-ups ("what is its punishment?") refer to the picked section
+        hit = st.session_state.rag.searcher.get_section(section) if st.session_state.rag.searcher else None
+        if hit:
+            st.session_state.conversation['last_query'] = request
+            st.session_state.conversation['last_results'] = [hit]
+        with st.chat_message("user"):
+            st.markdown(request)
+        with st.chat_message("assistant"):
+            st.markdown(answer)
+    
     if user_input:
         # Add user message to chat history
-        st.session_state.messages.append({"role": "user", "content": user_input})
+        append_message(st.session_state.messages, "user", user_input)
         
         # Display user message
         with st.chat_message("user"):
@@ -117,19 +205,49 @@ def main():
         
         # Generate and display assistant response
         with st.chat_message("assistant"):
+            placeholder = st.empty()
+            pending = None
+            trace = {}
             if st.session_state.rag:
                 with st.spinner("🔍 Searching IPC database..."):
                     try:
-                        response = st.session_state.rag.ask(user_input)
+                        response, pending = st.session_state.rag.ask_with_deadline(
+                            user_input, conversation=st.session_state.conversation,
+                            profile=profile_next, trace=trace
+                        )
                     except Exception as e:
                         response = f"Error: {str(e)}"
             else:
                 response = "❌ IPC system not available. Please refresh the page."
             
-            st.markdown(response)
+            if response == LLM_BUSY_MESSAGE:
+                placeholder.warning(response)
+            else:
+                placeholder.markdown(response)
+            if trace.get('profile'):
+                st.caption(f"🔬 Profile written to {trace['profile']}")
+            elif profile_next:
+                st.caption("🔬 No profile written (another capture was in progress or the write failed)")
+            
+            # The LLM missed the deadline: show the extractive answer now and
+            # replace it with the full answer if it still arrives (an error
+            # or busy message is not an answer: keep the extractive one)
+            if pending is not None:
+                fallback = response
+                try:
+                    streamed = ""
+                    for token in pending.iter_tokens(timeout=LLM_LATE_ANSWER_TIMEOUT):
+                        streamed += token
+                        placeholder.markdown(streamed + " ▌")
+                    response = pending.result(timeout=LLM_LATE_ANSWER_TIMEOUT)
+                except Exception:
+                    response = fallback
+                if response.startswith(ERROR_ANSWER_PREFIXES):
+                    response = fallback
+                placeholder.markdown(response)
         
         # Add assistant response to chat history
-        st.session_state.messages.append({"role": "assistant", "content": response})
+        append_message(st.session_state.messages, "assistant", response)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
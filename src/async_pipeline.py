@@ -0,0 +1,112 @@
+import sys
+import asyncio
+import threading
+from functools import partial
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import ASYNC_RETRIEVAL_WORKERS
+from src.rate_limiter import call_llm_async, PRIORITY_INTERACTIVE
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_retrieval_executor():
+    """Process-wide pool for the blocking part of a query (encode, index search, lookups).
+
+    Kept small on purpose: it bounds CPU work, while waiting on the LLM
+    happens on the event loop and holds no thread at all.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=ASYNC_RETRIEVAL_WORKERS, thread_name_prefix="async-retrieval"
+                )
+    return _executor
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a blocking call on the retrieval executor.
+
+    A cancelled caller stops waiting immediately; the call itself finishes
+    in the background (a running thread cannot be interrupted).
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_retrieval_executor(), partial(fn, *args, **kwargs))
+
+
+def create_async_client():
+    """AsyncGroq client, or None when it cannot be created.
+
+    The client's connection pool belongs to the event loop that first uses it,
+    so keep one per loop (one per RAG instance in a single-loop server).
+    """
+    try:
+        import groq
+        from src.config import GROQ_API_KEY
+        return groq.AsyncGroq(api_key=GROQ_API_KEY)
+    except Exception as e:
+        print(f"❌ Failed to initialize async Groq client: {e}")
+        return None
+
+
+async def complete_async(client, model, messages, max_tokens=1024, on_token=None, priority=PRIORITY_INTERACTIVE):
+    """Chat completion under the shared LLM limiter, streamed to on_token if given"""
+    prompt_text = "\n".join(message['content'] for message in messages)
+    if on_token is None:
+        response = await call_llm_async(lambda: client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0.1,
+            max_tokens=max_tokens
+        ), prompt_text, max_tokens, priority)
+        return response.choices[0].message.content
+
+    stream = await call_llm_async(lambda: client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=0.1,
+        max_tokens=max_tokens,
+        stream=True
+    ), prompt_text, max_tokens, priority)
+    parts = []
+    try:
+        async for chunk in stream:
+            token = chunk.choices[0].delta.content
+            if token:
+                parts.append(token)
+                on_token(token)
+    finally:
+        # On cancellation this drops the HTTP response, so generation stops too
+        await stream.close()
+    return "".join(parts)
+
+
+async def cancel_on_disconnect(coro, is_disconnected, poll_interval=0.5):
+    """Await coro, cancelling it once `await is_disconnected()` is true.
+
+    is_disconnected is e.g. Starlette's request.is_disconnected. Returns
+    None when the client went away before the answer was ready.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await is_disconnected():
+                print("🔌 Client disconnected, cancelling its question")
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                return None
+    finally:
+        if not task.done():
+            task.cancel()
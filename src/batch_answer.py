@@ -0,0 +1,158 @@
+import sys
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import BATCH_ANSWER_CONCURRENCY, BATCH_RETRIEVAL_SIZE
+from src.rate_limiter import ERROR_ANSWER_PREFIXES, PRIORITY_BATCH
+from src.query_log import normalize_query
+
+QUESTION_FIELDS = ("question", "query", "title")
+ID_FIELDS = ("id", "request_id")
+
+
+def read_questions(input_path, question_field=None):
+    """Yield (id, question) pairs from a JSONL file"""
+    fields = (question_field,) if question_field else QUESTION_FIELDS
+    with open(input_path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                print(f"⚠️ Skipping invalid JSON on line {line_no}")
+                continue
+            question = next((record[field] for field in fields if record.get(field)), None)
+            if not question:
+                print(f"⚠️ Skipping line {line_no}: no question field")
+                continue
+            item_id = next((record[field] for field in ID_FIELDS if field in record), line_no)
+            yield str(item_id), question
+
+
+def read_completed_ids(output_path):
+    """IDs already answered successfully in a previous (partial) run"""
+    done = set()
+    if not Path(output_path).exists():
+        return done
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A run killed mid-write can leave a truncated last line
+                continue
+            if record.get('status') == 'ok':
+                done.add(str(record['id']))
+    return done
+
+
+def answer_file(input_path, output_path, concurrency=None, k=5, question_field=None, rag=None):
+    """Answer every question in input_path, streaming results to output_path"""
+    if concurrency is None:
+        concurrency = BATCH_ANSWER_CONCURRENCY
+
+    done = read_completed_ids(output_path)
+    groups = {}
+    skipped = 0
+    for item_id, question in read_questions(input_path, question_field):
+        if item_id in done:
+            skipped += 1
+            continue
+        # Questions differing only in case/whitespace are answered once
+        groups.setdefault(normalize_query(question), []).append((item_id, question))
+
+    total_items = sum(len(items) for items in groups.values())
+    print(f"📥 {total_items} questions to answer ({len(groups)} unique, {skipped} already done)")
+    if not groups:
+        return {'answered': 0, 'unique': 0, 'skipped': skipped, 'errors': 0}
+
+    if rag is None:
+        from src.complete_ipc_rag import CompleteIPCRAG
+        rag = CompleteIPCRAG()
+
+    write_lock = threading.Lock()
+    stats = {'answered': 0, 'unique': len(groups), 'skipped': skipped, 'errors': 0}
+    # Bound outstanding generations so retrieval does not run far ahead
+    slots = threading.BoundedSemaphore(concurrency * 2)
+    run_start = time.perf_counter()
+
+    with open(output_path, 'a', encoding='utf-8') as out, ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+        def generate(items, context, retrieval_ms):
+            question = items[0][1]
+            start = time.perf_counter()
+            try:
+                # Interactive users get LLM quota ahead of bulk jobs
+                answer = rag.answer_with_context(question, context, priority=PRIORITY_BATCH)
+                # Failures come back as answer text; they are retried on resume
+                if answer.startswith(ERROR_ANSWER_PREFIXES):
+                    status, error = 'error', answer
+                else:
+                    status, error = 'ok', None
+            except Exception as e:
+                answer, status, error = None, 'error', str(e)
+            generation_ms = (time.perf_counter() - start) * 1000
+
+            with write_lock:
+                for index, (item_id, item_question) in enumerate(items):
+                    record = {
+                        'id': item_id,
+                        'question': item_question,
+                        'answer': answer,
+                        'status': status,
+                        'deduplicated': index > 0,
+                        'timings': {
+                            'retrieval_ms': round(retrieval_ms, 1),
+                            'generation_ms': round(generation_ms, 1),
+                            'total_ms': round(retrieval_ms + generation_ms, 1)
+                        }
+                    }
+                    if error:
+                        record['error'] = error
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                stats['answered'] += len(items)
+                if status != 'ok':
+                    stats['errors'] += len(items)
+                print(f"✅ {stats['answered']}/{total_items} answered")
+
+        group_list = list(groups.values())
+        for start in range(0, len(group_list), BATCH_RETRIEVAL_SIZE):
+            batch = group_list[start:start + BATCH_RETRIEVAL_SIZE]
+            retrieval_start = time.perf_counter()
+            contexts = rag.get_ipc_contexts([items[0][1] for items in batch], k=k)
+            # One search serves the whole batch; attribute an equal share to each item
+            retrieval_ms = (time.perf_counter() - retrieval_start) * 1000 / len(batch)
+
+            for items, context in zip(batch, contexts):
+                slots.acquire()
+                future = executor.submit(generate, items, context, retrieval_ms)
+                future.add_done_callback(lambda _: slots.release())
+
+    elapsed = time.perf_counter() - run_start
+    print(f"🏁 Answered {stats['answered']} questions ({stats['unique']} unique) in {elapsed:.1f}s, "
+          f"{stats['errors']} errors")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer IPC questions in bulk from a JSONL file")
+    parser.add_argument("input", help="JSONL file with one question per line")
+    parser.add_argument("output", help="JSONL file to stream answers to (resumed if it exists)")
+    parser.add_argument("--concurrency", type=int, default=None, help="Parallel LLM calls")
+    parser.add_argument("--k", type=int, default=5, help="Sections retrieved per question")
+    parser.add_argument("--field", default=None, help="Question field name (default: question/query/title)")
+    args = parser.parse_args()
+    answer_file(args.input, args.output, args.concurrency, args.k, args.field)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+import re
+import sys
+import csv
+import json
+import time
+import pickle
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import BNS_PDF_PATH, BNS_MATCH_THRESHOLD, BNS_CANDIDATES, BNS_REVIEWED_PATH
+from src.cross_references import section_key
+
+# Well-established IPC -> BNS correspondences (from the official comparison
+# tables). Subsections are kept for display; lookups use the section number.
+# Reviewed additions go in BNS_REVIEWED_PATH rather than here.
+EXPLICIT_IPC_TO_BNS = {
+    "34": "3(5)", "120A": "61(1)", "120B": "61(2)", "149": "190",
+    "299": "100", "300": "101", "302": "103(1)", "304": "105", "304A": "106(1)", "304B": "80",
+    "306": "108", "307": "109", "323": "115(2)", "324": "118(1)", "325": "117(2)", "326": "118(2)",
+    "341": "126(2)", "342": "127(2)", "354": "74", "354A": "75", "354B": "76", "354C": "77", "354D": "78",
+    "363": "137(2)", "375": "63", "376": "64", "376D": "70(1)",
+    "378": "303(1)", "379": "303(2)", "380": "305", "383": "308(1)", "384": "308(2)",
+    "390": "309(1)", "392": "309(4)", "391": "310(1)", "395": "310(2)",
+    "405": "316(1)", "406": "316(2)", "409": "316(5)", "415": "318(1)", "420": "318(4)",
+    "447": "329(3)", "494": "82(1)", "498A": "85", "499": "356(1)", "500": "356(2)",
+    "503": "351(1)", "506": "351(2)", "509": "79", "511": "62",
+}
+
+SECTION_LINE = re.compile(r"^(\d{1,3})\.\s+(.+)$")
+CHAPTER_LINE = re.compile(r"^CHAPTER\s+([IVXLC]+)\s*$")
+BODY_START = re.compile(r"BE it enacted", re.IGNORECASE)
+SNIPPET_CHARS = 400
+
+
+def base_section(reference):
+    """'103(1)' -> '103'"""
+    return section_key(reference.split('(')[0])
+
+
+def clean(text):
+    return " ".join(text.split())
+
+
+def parse_arrangement(pages):
+    """Section number -> title and chapter from the Arrangement of Sections"""
+    sections = {}
+    chapter = None
+    pending_chapter = False
+    current = None
+    for page in pages:
+        for raw in page.splitlines():
+            line = raw.strip()
+            if not line or line.isdigit() or line in ("SECTIONS", "________", "ARRANGEMENT OF SECTIONS"):
+                continue
+            chapter_match = CHAPTER_LINE.match(line)
+            if chapter_match:
+                chapter = {'number': chapter_match.group(1), 'title': ""}
+                pending_chapter = True
+                current = None
+                continue
+            if pending_chapter:
+                chapter['title'] = line.title()
+                pending_chapter = False
+                continue
+            section_match = SECTION_LINE.match(line)
+            if section_match:
+                current = section_match.group(1)
+                sections[current] = {
+                    'section': current,
+                    'title': section_match.group(2),
+                    'chapter': chapter['number'] if chapter else None,
+                    'chapter_title': chapter['title'] if chapter else None
+                }
+            elif current and not sections[current]['title'].endswith('.'):
+                # Title wrapped onto the next line
+                sections[current]['title'] += " " + line
+            else:
+                # Sub-heading such as "Of criminal conspiracy"
+                current = None
+
+    for entry in sections.values():
+        entry['title'] = clean(entry['title']).rstrip('.')
+    return sections
+
+
+def parse_body(text, numbers):
+    """Section number -> provision text, finding each section start in order"""
+    bodies = {}
+    starts = []
+    position = 0
+    for number in numbers:
+        match = re.compile(rf"(?m)^\s*{number}\.\s*\S").search(text, position)
+        if match:
+            starts.append((number, match.start()))
+            position = match.end()
+    for (number, start), (_, end) in zip(starts, starts[1:] + [(None, len(text))]):
+        bodies[number] = clean(text[start:end])
+    return bodies
+
+
+def parse_bns_sections(pages):
+    """Structured sections of the Bharatiya Nyaya Sanhita from its PDF page texts"""
+    body_page = next((i for i, page in enumerate(pages) if BODY_START.search(page)), len(pages))
+    sections = parse_arrangement(pages[:body_page])
+    numbers = sorted(sections, key=int)
+    bodies = parse_body("\n".join(pages[body_page:]), numbers)
+
+    for number, entry in sections.items():
+        body = bodies.get(number, "")
+        # Drop "103. Title.—" to keep just the provision
+        heading = re.match(rf"{number}\.\s*.*?[—–]+\s*", body)
+        entry['text'] = body[heading.end():] if heading else body
+    print(f"📜 Parsed {len(sections)} BNS sections ({sum(1 for s in sections.values() if s['text'])} with text)")
+    return sections
+
+
+def load_bns_sections(pdf_path=BNS_PDF_PATH):
+    from utils.extraction_cache import ExtractionCache
+    from utils.file_handlers import extract_pdf_pages
+    return parse_bns_sections(ExtractionCache().pages(str(pdf_path), extract_pdf_pages))
+
+
+def load_reviewed(path=BNS_REVIEWED_PATH):
+    """Human-reviewed IPC -> BNS pairs, same shape as EXPLICIT_IPC_TO_BNS"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return {section_key(k): str(v) for k, v in json.load(f).items()}
+    except OSError:
+        return {}
+
+
+def match_candidates(model, ipc_data, bns_sections, ipc_embeddings=None):
+    """Top BNS candidates for every IPC section by embedding similarity"""
+    import faiss
+    import numpy as np
+    from src.embedding_pipeline import encode_texts
+
+    bns_numbers = list(bns_sections)
+    bns_texts = [f"{bns_sections[n]['title']}. {bns_sections[n]['text'][:SNIPPET_CHARS]}" for n in bns_numbers]
+    bns_embeddings = np.ascontiguousarray(encode_texts(model, bns_texts), dtype='float32')
+    faiss.normalize_L2(bns_embeddings)
+
+    if ipc_embeddings is None:
+        ipc_texts = [f"{s['section_title']}. {s['section_desc'][:SNIPPET_CHARS]}" for s in ipc_data]
+        ipc_embeddings = encode_texts(model, ipc_texts)
+    # Copy: the caller's embeddings are normalised/indexed separately
+    ipc_embeddings = np.array(ipc_embeddings, dtype='float32')
+    faiss.normalize_L2(ipc_embeddings)
+
+    index = faiss.IndexFlatIP(bns_embeddings.shape[1])
+    index.add(bns_embeddings)
+    scores, ids = index.search(ipc_embeddings, min(BNS_CANDIDATES, len(bns_numbers)))
+
+    candidates = {}
+    for section, row_scores, row_ids in zip(ipc_data, scores, ids):
+        candidates[section_key(section['Section'])] = [
+            {'bns': bns_numbers[i], 'score': round(float(score), 4)}
+            for score, i in zip(row_scores, row_ids) if i >= 0
+        ]
+    return candidates
+
+
+def build_bns_mapping(ipc_data, model, ipc_embeddings=None, pdf_path=BNS_PDF_PATH):
+    """IPC <-> BNS correspondence table for O(1) lookups.
+
+    Explicit and reviewed pairs are authoritative; otherwise the best
+    embedding match above BNS_MATCH_THRESHOLD is used and flagged for review.
+    """
+    start = time.perf_counter()
+    bns_sections = load_bns_sections(pdf_path)
+    if not bns_sections:
+        raise ValueError(f"no BNS sections found in {pdf_path}")
+    candidates = match_candidates(model, ipc_data, bns_sections, ipc_embeddings)
+    authoritative = dict(EXPLICIT_IPC_TO_BNS)
+    authoritative.update(load_reviewed())
+
+    ipc_titles = {section_key(s['Section']): s['section_title'] for s in ipc_data}
+    ipc_to_bns = {}
+    for ipc in ipc_titles:
+        if ipc in authoritative:
+            reference = authoritative[ipc]
+            ipc_to_bns[ipc] = {'bns': reference, 'source': 'explicit', 'score': None}
+        elif candidates.get(ipc) and candidates[ipc][0]['score'] >= BNS_MATCH_THRESHOLD:
+            best = candidates[ipc][0]
+            ipc_to_bns[ipc] = {'bns': best['bns'], 'source': 'matched', 'score': best['score']}
+
+    bns_to_ipc = {}
+    for ipc, entry in ipc_to_bns.items():
+        bns_to_ipc.setdefault(base_section(entry['bns']), []).append({'ipc': ipc, **entry})
+
+    explicit = sum(1 for e in ipc_to_bns.values() if e['source'] == 'explicit')
+    print(f"🔁 IPC↔BNS table: {explicit} explicit, {len(ipc_to_bns) - explicit} matched "
+          f"(of {len(ipc_titles)} IPC sections) in {time.perf_counter() - start:.1f}s")
+    return {
+        'ipc_to_bns': ipc_to_bns,
+        'bns_to_ipc': bns_to_ipc,
+        'bns_sections': {n: {k: v for k, v in s.items() if k != 'text'} for n, s in bns_sections.items()},
+        'ipc_titles': ipc_titles,
+        'candidates': candidates
+    }
+
+
+def equivalents(mapping, section, code='ipc'):
+    """Sections of the other code corresponding to an IPC or BNS section.
+
+    None when there is no table or the section does not exist in `code`.
+    """
+    if not mapping:
+        return None
+    if code == 'ipc':
+        key = section_key(section)
+        if key not in mapping['ipc_titles']:
+            return None
+        entry = mapping['ipc_to_bns'].get(key)
+        entries = [dict(entry, section=entry['bns'], base=base_section(entry['bns']))] if entry else []
+        titles = {e['base']: mapping['bns_sections'].get(e['base'], {}).get('title') for e in entries}
+        title = mapping['ipc_titles'][key]
+    else:
+        key = base_section(str(section))
+        if key not in mapping['bns_sections']:
+            return None
+        entries = [dict(entry, section=entry['ipc'], base=entry['ipc']) for entry in mapping['bns_to_ipc'].get(key, [])]
+        titles = {e['base']: mapping['ipc_titles'].get(e['base']) for e in entries}
+        title = mapping['bns_sections'][key]['title']
+
+    return {
+        'code': code,
+        'section': key,
+        'title': title,
+        'matches': [
+            {'section': e['section'], 'title': titles[e['base']], 'source': e['source'], 'score': e['score']}
+            for e in entries
+        ]
+    }
+
+
+def export_review(mapping, output_path):
+    """CSV of every IPC section without an explicit pair, with its candidates"""
+    rows = 0
+    with open(output_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['ipc', 'ipc_title', 'mapped_bns', 'rank', 'candidate_bns', 'candidate_title', 'score'])
+        for ipc, title in mapping['ipc_titles'].items():
+            entry = mapping['ipc_to_bns'].get(ipc)
+            if entry and entry['source'] == 'explicit':
+                continue
+            for rank, candidate in enumerate(mapping['candidates'].get(ipc, []), 1):
+                bns = mapping['bns_sections'].get(candidate['bns'], {})
+                writer.writerow([ipc, title, entry['bns'] if entry else "", rank,
+                                 candidate['bns'], bns.get('title', ""), candidate['score']])
+                rows += 1
+    print(f"📝 Wrote {rows} candidate rows to {output_path}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the IPC↔BNS table stored with the IPC knowledge base")
+    parser.add_argument("command", choices=["review", "lookup"])
+    parser.add_argument("arg", help="review: output CSV path; lookup: IPC section number")
+    parser.add_argument("--kb", default="knowledge_base/ipc_complete")
+    args = parser.parse_args()
+
+    from src.kb_store import resolve_kb_dir
+    kb_dir, _ = resolve_kb_dir(args.kb)
+    with open(kb_dir / "metadata.pkl", 'rb') as f:
+        mapping = pickle.load(f).get('bns_mapping')
+    if not mapping:
+        print(f"❌ {args.kb} has no IPC↔BNS table; rebuild it with src/ipc_json_loader.py")
+        sys.exit(1)
+
+    if args.command == "review":
+        export_review(mapping, args.arg)
+    else:
+        print(equivalents(mapping, args.arg, 'ipc') or f"IPC Section {args.arg} not found")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+from contextlib import contextmanager
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import FAISS_DIRECTORY, DEDUP_ENABLED
+
+# What each knowledge base is built from and where it goes. All 'documents'
+# targets share one load/chunk/dedup/encode pass over data/.
+TARGETS = {
+    'ipc_complete': {'input': 'ipc_json', 'backend': 'faiss', 'path': 'knowledge_base/ipc_complete', 'default': True},
+    'faiss_db': {'input': 'documents', 'backend': 'faiss', 'path': FAISS_DIRECTORY, 'default': True},
+    'chroma_db': {'input': 'documents', 'backend': 'chroma', 'path': 'knowledge_base/chroma_db', 'default': False},
+}
+
+
+class StageTimer:
+    """Wall-clock time of each build stage, in order"""
+
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        print(f"\n▶️ {name}")
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def progress_recorder(self, prefix):
+        """progress(stage, percent) callback that times each reported sub-stage"""
+        state = {'name': None, 'start': None}
+
+        def progress(stage, percent):
+            now = time.perf_counter()
+            if state['name'] is not None:
+                self.stages.append((f"{prefix}: {state['name']}", now - state['start']))
+            state['name'], state['start'] = (stage, now) if percent < 100 else (None, None)
+        return progress
+
+    def report(self):
+        total = sum(seconds for _, seconds in self.stages)
+        print(f"\n⏱️ {'stage':<44}{'seconds':>9}")
+        for name, seconds in self.stages:
+            print(f"   {name:<44}{seconds:>9.2f}")
+        print(f"   {'total':<44}{total:>9.2f}")
+
+
+def publish_to_backend(target, texts, metadatas, embeddings, model_hash, dedup_report):
+    if target['backend'] == 'faiss':
+        from src.faiss_builder import publish_faiss_index
+        # normalize_L2 works in place; other backends get the raw vectors
+        publish_faiss_index(Path(target['path']), texts, metadatas, embeddings.copy(), model_hash, dedup_report)
+    elif target['backend'] == 'chroma':
+        from src.minimal_builder_final import store_in_chroma
+        store_in_chroma(texts, metadatas, embeddings, path=target['path'])
+    else:
+        raise ValueError(f"unknown backend {target['backend']}")
+
+
+def build_document_targets(names, model, model_hash, timer, results):
+    """One pass over data/ fanned out to every requested document index"""
+    from utils.file_handlers import load_documents
+    from src.chunker import chunk_documents
+    from src.embedding_pipeline import encode_texts
+
+    with timer.stage("load documents"):
+        documents = load_documents()
+    if not documents:
+        print("❌ No documents found.")
+        results.update({name: False for name in names})
+        return
+
+    with timer.stage("chunk"):
+        texts, metadatas = chunk_documents(documents)
+        print(f"📦 Created {len(texts)} chunks from {len(documents)} documents")
+
+    dedup_report = None
+    if DEDUP_ENABLED:
+        from src.dedup import dedupe_chunks
+        with timer.stage("dedup"):
+            texts, metadatas, dedup_report = dedupe_chunks(
+                texts, metadatas, dimension=model.get_sentence_embedding_dimension()
+            )
+
+    with timer.stage("encode chunks"):
+        embeddings = encode_texts(model, texts)
+
+    for name in names:
+        target = TARGETS[name]
+        try:
+            with timer.stage(f"{name}: {target['backend']} index"):
+                publish_to_backend(target, texts, metadatas, embeddings, model_hash, dedup_report)
+            results[name] = True
+        except Exception as e:
+            print(f"❌ {name} failed: {e}")
+            results[name] = False
+
+
+def run_build(names=None):
+    """Build the named targets (default: those marked default) with one shared model"""
+    names = list(names or [name for name, target in TARGETS.items() if target['default']])
+    unknown = [name for name in names if name not in TARGETS]
+    if unknown:
+        raise ValueError(f"unknown targets: {', '.join(unknown)} (choose from {', '.join(TARGETS)})")
+
+    from src.model_store import load_embedding_model
+
+    timer = StageTimer()
+    results = {}
+    print(f"🏗️ Building: {', '.join(names)}")
+
+    try:
+        with timer.stage("load model"):
+            model, model_hash = load_embedding_model()
+    except Exception as e:
+        print(f"❌ Failed to load model: {e}")
+        return {name: False for name in names}
+
+    document_targets = [name for name in names if TARGETS[name]['input'] == 'documents']
+    if document_targets:
+        build_document_targets(document_targets, model, model_hash, timer, results)
+
+    for name in names:
+        if TARGETS[name]['input'] != 'ipc_json':
+            continue
+        from src.ipc_json_loader import create_ipc_knowledge_base
+        results[name] = create_ipc_knowledge_base(
+            progress=timer.progress_recorder(name), model=model, model_hash=model_hash,
+            kb_dir=TARGETS[name]['path']
+        )
+
+    timer.report()
+    for name in names:
+        print(f"{'✅' if results.get(name) else '❌'} {name} → {TARGETS[name]['path']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build knowledge bases in one pass with a shared model")
+    parser.add_argument("targets", nargs="*", help=f"Targets to build (default: {', '.join(n for n, t in TARGETS.items() if t['default'])})")
+    parser.add_argument("--all", action="store_true", help="Build every target")
+    parser.add_argument("--list", action="store_true", help="List targets and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, target in TARGETS.items():
+            marker = "*" if target['default'] else " "
+            print(f"{marker} {name:<14}{target['input']:<11}{target['backend']:<8}{target['path']}")
+        return
+
+    try:
+        results = run_build(list(TARGETS) if args.all else args.targets)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+    if not all(results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
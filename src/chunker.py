@@ -0,0 +1,119 @@
+import os
+import re
+import sys
+from bisect import bisect_right
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import CHUNK_SIZE, CHUNK_OVERLAP, MAX_CHUNK_TOKENS
+
+WORD_PATTERN = re.compile(r'\S+')
+PIECE_PATTERN = re.compile(r'\w+|[^\w\s]')
+SENTENCE_END = ('.', ';', ':', '?', '!')
+
+
+def estimate_tokens(text):
+    """Cheap WordPiece-style token estimate (errs on the high side)"""
+    count = 0
+    for piece in PIECE_PATTERN.findall(text):
+        # Long or rare words are split into several sub-word pieces
+        count += 1 + len(piece) // 8
+    return count
+
+
+def page_for_offset(page_offsets, offset):
+    """Return the 1-based page number containing a character offset"""
+    if not page_offsets:
+        return 1
+    return max(1, bisect_right(page_offsets, offset))
+
+
+def chunk_text(text, chunk_size=None, chunk_overlap=None, max_tokens=None, page_offsets=None):
+    """Split text into bounded, overlapping chunks with offset, page and token provenance"""
+    if chunk_size is None:
+        chunk_size = CHUNK_SIZE
+    if chunk_overlap is None:
+        chunk_overlap = CHUNK_OVERLAP
+    if max_tokens is None:
+        max_tokens = MAX_CHUNK_TOKENS
+
+    words = [(m.start(), m.end(), estimate_tokens(m.group())) for m in WORD_PATTERN.finditer(text)]
+    chunks = []
+    first = 0
+
+    while first < len(words):
+        chunk_start = words[first][0]
+        tokens = 0
+        last = first
+        boundary = None
+
+        # Grow the window until either the character or the token budget is hit
+        while last < len(words):
+            start, end, word_tokens = words[last]
+            if last > first and (end - chunk_start > chunk_size or tokens + word_tokens > max_tokens):
+                break
+            tokens += word_tokens
+            if text[end - 1] in SENTENCE_END or text[end:end + 2] == '\n\n':
+                boundary = last
+            last += 1
+
+        # Prefer to end on a sentence/paragraph boundary if it keeps most of the window
+        if last < len(words) and boundary is not None and boundary > first and \
+                words[boundary][1] - chunk_start >= chunk_size // 2:
+            last = boundary + 1
+
+        chunk_end = words[last - 1][1]
+        chunk = text[chunk_start:chunk_end]
+        chunks.append({
+            'text': chunk,
+            'start_char': chunk_start,
+            'end_char': chunk_end,
+            'page': page_for_offset(page_offsets, chunk_start),
+            'page_end': page_for_offset(page_offsets, chunk_end - 1),
+            'token_count': sum(w[2] for w in words[first:last])
+        })
+
+        if last >= len(words):
+            break
+
+        # Step back for overlap, always making forward progress
+        next_first = last
+        while next_first - 1 > first and chunk_end - words[next_first - 1][0] <= chunk_overlap:
+            next_first -= 1
+        first = next_first
+
+    return chunks
+
+
+def chunk_document(doc, chunk_size=None, chunk_overlap=None, max_tokens=None):
+    """Chunk a document dict produced by utils.file_handlers.load_documents"""
+    return chunk_text(
+        doc['content'],
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        max_tokens=max_tokens,
+        page_offsets=doc.get('page_offsets')
+    )
+
+
+def chunk_documents(documents):
+    """Texts and metadata of every chunk of every document, as stored by the builders"""
+    texts = []
+    metadatas = []
+    for doc_idx, doc in enumerate(documents):
+        for chunk_idx, chunk in enumerate(chunk_document(doc)):
+            texts.append(chunk['text'])
+            metadatas.append({
+                "source": os.path.basename(doc['source']),
+                "doc_index": doc_idx,
+                "chunk_index": chunk_idx,
+                "type": doc['type'],
+                "full_source": doc['source'],
+                "page": chunk['page'],
+                "page_end": chunk['page_end'],
+                "start_char": chunk['start_char'],
+                "end_char": chunk['end_char'],
+                "token_count": chunk['token_count']
+            })
+    return texts, metadatas
@@ -1,13 +1,141 @@
+import re
 import sys
+import time
+import asyncio
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 
 sys.path.append(str(Path(__file__).parent.parent))
 
+from src.single_flight import SingleFlight, AsyncSingleFlight
+from src.async_pipeline import run_blocking, create_async_client, complete_async
+from src.profiling import should_profile, profile_request, is_profiling
+from src.query_log import log_query, normalize_query, result_ids
+from src.rate_limiter import (
+    call_llm,
+    LLMBusyError,
+    LLM_BUSY_MESSAGE,
+    LLM_UNAVAILABLE_MESSAGE,
+    LLM_ERROR_PREFIX,
+    PRIORITY_INTERACTIVE
+)
+from src.config import (
+    FOLLOWUP_MAX_WORDS,
+    FOLLOWUP_EXTRA_K,
+    LLM_DEADLINE_SECONDS,
+    LLM_MAX_WORKERS,
+    CROSS_REF_MAX_SECTIONS,
+    CROSS_REF_TOKEN_BUDGET,
+    KB_BOOTSTRAP,
+    RETRIEVAL_SERVER_URL
+)
+from src.chunker import estimate_tokens
+from src.kb_store import kb_status
+from src.kb_bootstrap import KBBootstrapper
+from src.section_lookup import IPC_JSON_PATH, IPC_KB_SOURCES, JSONSectionSearcher
+from src.section_suggest import SectionSuggester
+
+PRIMARY_KB = "knowledge_base/ipc_complete"
+
+NO_CONTEXT_ANSWER = "I couldn't find relevant IPC sections for your query. Please try asking about specific IPC sections or crimes."
+EXTRACTIVE_ANSWER_LABEL = (
+    "⚡ **Quick answer extracted from the IPC text.** "
+    "The detailed AI explanation is taking longer than usual."
+)
+BOOTSTRAP_ANSWER = (
+    "🏗️ The IPC search index is still being built ({stage}, {percent}%). "
+    "Meanwhile I can look up exact sections: try asking e.g. \"What is Section 302?\""
+)
+EXTRACTIVE_MAX_SECTIONS = 3
+EXTRACTIVE_SNIPPET_CHARS = 300
+PUNISHMENT_PATTERN = re.compile(r"punish|imprison|fine\b|death|transportation", re.IGNORECASE)
+
+RETRIEVAL_K = 5  # sections retrieved per question (and kept for its follow-ups)
+
+# Pronouns/connectives that point back at the previous question
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(it|its|it's|this|that|these|those|they|them|their|same|such|above|said)\b"
+    r"|^\s*(and|also|what about|how about|then)\b",
+    re.IGNORECASE
+)
+# Words that don't give a question a subject of its own: with only these
+# around the pronoun ("what is its punishment?", "is that bailable?") the
+# question is about the previous one. Anything else ("is it a crime to
+# threaten someone...") is a new question.
+FOLLOW_UP_FILLER_WORDS = frozenset("""
+    a an the and or also then what about how which who whom whose when where why is are was were be been
+    it its it's this that that's these those they them their same such above said what's
+    do does did can could will would shall should may might must has have had
+    of for to in on by with from under as at if than so not no any there
+    me my i we our you your tell explain explained describe mean means meaning define definition
+    give list show more detail details detailed brief briefly simple simply plain words terms example examples
+    punishment punishments punishable punished penalty penalties fine fines sentence sentenced imprisonment jail
+    maximum minimum term years year life death bail bailable non cognizable compoundable triable court
+    section sections ipc law laws offence offences offense crime crimes provision provisions
+    exception exceptions apply applies applicable difference case cases
+""".split())
+WORD_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+# IPC <-> BNS questions are answered from the correspondence table
+BNS_QUERY_PATTERN = re.compile(r"\b(bns|bharatiya\s+nyaya\s+sanhita|nyaya\s+sanhita)\b", re.IGNORECASE)
+# "IPC 302", "BNS section 103" / "section 103 of the BNS" / bare "section 302 in BNS" (IPC)
+CODE_FIRST_PATTERN = re.compile(r"\b(ipc|bns)\s*(?:section|sec\.?|s\.)?\s*(\d{1,3}[a-z]{0,3})\b", re.IGNORECASE)
+NUMBER_FIRST_PATTERN = re.compile(
+    r"\b(?:section|sec\.?)\s*(\d{1,3}[a-z]{0,3})\b(?:\s*of\s+(?:the\s+)?(ipc|bns)\b)?",
+    re.IGNORECASE
+)
+CODE_NAMES = {'ipc': 'IPC', 'bns': 'BNS'}
+# An explicit section number always starts a fresh search
+SECTION_NUMBER_PATTERN = re.compile(r"\b\d{1,3}[a-z]{0,2}\b", re.IGNORECASE)
+
+def extract_field(content, label):
+    """Value of one ' | '-separated field of an IPC section text"""
+    for part in content.split(" | "):
+        if part.startswith(label):
+            return part[len(label):].strip()
+    return None
+
+def extract_punishment(description):
+    """Sentences of a section description that state the punishment"""
+    sentences = re.split(r"(?<=[.;])\s+", description)
+    clauses = [s.strip() for s in sentences if PUNISHMENT_PATTERN.search(s)]
+    return shorten(" ".join(clauses), EXTRACTIVE_SNIPPET_CHARS) if clauses else None
+
+def mapping_requests(query):
+    """(code, section) pairs named in an IPC <-> BNS question, in order"""
+    if not BNS_QUERY_PATTERN.search(query):
+        return []
+    found = []
+    spans = []
+    for match in CODE_FIRST_PATTERN.finditer(query):
+        found.append((match.start(), match.group(1).lower(), match.group(2).upper()))
+        spans.append(match.span())
+    for match in NUMBER_FIRST_PATTERN.finditer(query):
+        if any(start <= match.start(1) < end for start, end in spans):
+            continue
+        found.append((match.start(), (match.group(2) or 'ipc').lower(), match.group(1).upper()))
+    requests = []
+    for _, code, section in sorted(found):
+        if (code, section) not in requests:
+            requests.append((code, section))
+    return requests
+
+def shorten(text, limit):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit].rsplit(" ", 1)[0] + "..."
+
 class CompleteIPCRAG:
     def __init__(self):
         self.searcher = None
         self.client = None
         self.model_name = "llama-3.1-8b-instant"
+        # LLM calls run here so ask() can stop waiting at its deadline
+        self.llm_executor = ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS, thread_name_prefix="llm")
+        self.flights = SingleFlight()
+        # ask_async(): async Groq client and coalescing, bound to the serving event loop
+        self.async_client = None
+        self.async_flights = AsyncSingleFlight()
+        self.bootstrapper = None
+        self.suggester = None
         self.setup_components()
     
     def setup_components(self):
@@ -26,23 +154,38 @@ class CompleteIPCRAG:
         
         # Setup FAISS search with complete IPC knowledge base
         try:
-            # First try enhanced IPC knowledge base
-            from src.faiss_search import FAISSSearch
-            self.searcher = FAISSSearch()
+            # First try enhanced IPC knowledge base; uses the shared retrieval
+            # server instead of an in-process index when RETRIEVAL_SERVER_URL is set
+            from src.retrieval_client import create_searcher
+            self.searcher = create_searcher()
             
             # Try multiple knowledge base paths
             knowledge_bases = [
-                "knowledge_base/ipc_complete",
+                PRIMARY_KB,
                 "knowledge_base/faiss_db",  # fallback
             ]
             
+            # Build a missing or outdated IPC index in the background
+            if KB_BOOTSTRAP and not RETRIEVAL_SERVER_URL:
+                status = kb_status(PRIMARY_KB, IPC_KB_SOURCES)
+                if status != 'ok':
+                    print(f"⚠️ Knowledge base {PRIMARY_KB} is {status}")
+                    self.start_bootstrap()
+            
             loaded = False
             for kb_path in knowledge_bases:
                 if self.searcher.load_knowledge_base(kb_path):
                     print(f"✅ Knowledge base loaded from: {kb_path}")
+                    # Hot-swap rebuilt versions without restarting the app
+                    self.searcher.start_watcher()
                     loaded = True
                     break
             
+            if not loaded and self.bootstrapper:
+                # Serve exact-section lookups until the vector index is ready
+                self.searcher = JSONSectionSearcher()
+                loaded = self.searcher.load_knowledge_base()
+            
             if not loaded:
                 print("❌ No knowledge base could be loaded")
                 self.searcher = None
@@ -50,6 +193,92 @@ class CompleteIPCRAG:
         except Exception as e:
             print(f"❌ FAISS setup failed: {e}")
             self.searcher = None
+        
+        # Type-ahead index over section numbers and titles
+        try:
+            self.suggester = SectionSuggester.from_json(IPC_JSON_PATH)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Section suggestions unavailable: {e}")
+            self.suggester = None
+    
+    def start_bootstrap(self):
+        """Build the IPC knowledge base on a background worker"""
+        from src.ipc_json_loader import create_ipc_knowledge_base
+        self.bootstrapper = KBBootstrapper(PRIMARY_KB, create_ipc_knowledge_base, on_ready=self.use_built_kb)
+        self.bootstrapper.start()
+    
+    def use_built_kb(self, kb_path):
+        """Switch to a freshly built knowledge base unless the watcher will pick it up"""
+        current = self.searcher
+        if getattr(current, 'kb_path', None) == kb_path and hasattr(current, 'check_for_update'):
+            current.check_for_update()
+            return
+        
+        from src.faiss_search import FAISSSearch
+        searcher = FAISSSearch()
+        if searcher.load_knowledge_base(kb_path):
+            searcher.start_watcher()
+            self.searcher = searcher
+            if current is not None:
+                current.stop_watcher()
+    
+    def bootstrap_status(self):
+        """Progress of a background knowledge base build, or None"""
+        return self.bootstrapper.status() if self.bootstrapper else None
+    
+    def suggest_sections(self, text, limit=8):
+        """Sections matching a partly typed number or title"""
+        return self.suggester.suggest(text, limit) if self.suggester else []
+    
+    def section_answer(self, section):
+        """The text of one section by direct lookup, without search or LLM"""
+        hit = self.searcher.get_section(section) if self.searcher else None
+        if hit is None:
+            return f"IPC Section {section} is not available in my current database."
+        
+        metadata = hit['metadata']
+        parts = [f"**IPC Section {metadata.get('section', section)}: {metadata.get('section_title', '')}**"]
+        if metadata.get('chapter') and metadata.get('chapter_title'):
+            parts[0] += f"  \n📖 Chapter {metadata['chapter']}: {metadata['chapter_title']}"
+        parts.append(f"📝 {extract_field(hit['content'], 'Description:') or hit['content']}")
+        
+        punishment = extract_punishment(extract_field(hit['content'], 'Description:') or "")
+        if punishment:
+            parts.append(f"⚖️ Punishment: {punishment}")
+        references = self.searcher.get_cross_references(section) if hasattr(self.searcher, 'get_cross_references') else []
+        if references:
+            parts.append("🔗 Refers to: " + ", ".join(f"Section {ref}" for ref in references))
+        return "\n\n".join(parts)
+    
+    def mapping_answer(self, query):
+        """Answer "BNS equivalent of IPC 302"-style questions by table lookup, or None"""
+        if not hasattr(self.searcher, 'get_equivalents'):
+            return None
+        requests = mapping_requests(query)
+        if not requests:
+            return None
+        
+        parts = []
+        for code, section in requests:
+            result = self.searcher.get_equivalents(section, code)
+            other = 'bns' if code == 'ipc' else 'ipc'
+            if result is None:
+                parts.append(f"{CODE_NAMES[code]} Section {section} is not in the IPC↔BNS table.")
+                continue
+            source = f"**{CODE_NAMES[code]} Section {result['section']}** ({result['title']})"
+            if not result['matches']:
+                parts.append(f"No {CODE_NAMES[other]} equivalent is recorded for {source}.")
+                continue
+            for match in result['matches']:
+                line = f"{source} → **{CODE_NAMES[other]} Section {match['section']}** ({match['title']})"
+                if match['source'] != 'explicit':
+                    line += f"  \n_Suggested by automatic matching (similarity {match['score']:.2f}); not yet reviewed._"
+                parts.append(line)
+        
+        if all("not in the IPC↔BNS table" in part for part in parts):
+            # No table loaded (or unknown sections): let normal retrieval try
+            return None
+        return "\n\n".join(parts)
     
     def get_ipc_context(self, query, k=5):
         """Get comprehensive IPC context"""
@@ -57,21 +286,71 @@ class CompleteIPCRAG:
             return "IPC legal database not available."
         
         results = self.searcher.search(query, k=k)
+        return self.build_ipc_context(results)
+    
+    def get_ipc_contexts(self, queries, k=5):
+        """Get IPC context for several queries with one batched search"""
+        if not self.searcher:
+            return ["IPC legal database not available."] * len(queries)
+        
+        try:
+            batch_results = self.searcher.search_batch(list(queries), [k] * len(queries))
+        except Exception as e:
+            print(f"⚠️ Batched search failed, searching one by one: {e}")
+            return [self.get_ipc_context(query, k=k) for query in queries]
+        return [self.build_ipc_context(results) for results in batch_results]
+    
+    def build_ipc_context(self, results):
+        """Turn search results into the context block used in the prompt"""
         if not results:
             return "No relevant IPC sections found."
         
         context_parts = []
+        relevant = []
         for i, result in enumerate(results):
             if result['score'] > 0.1:  # Lower threshold for comprehensive coverage
                 metadata = result['metadata']
                 content = self.format_ipc_content(result['content'], metadata)
                 context_parts.append(content)
+                relevant.append(result)
         
         if not context_parts:
             return "No sufficiently relevant IPC sections found."
         
+        # Sections the retrieved ones cite, by direct lookup (no extra search)
+        context_parts.extend(self.referenced_sections(relevant))
+        
         return "\n\n" + "="*60 + "\n" + "\n".join(context_parts) + "\n" + "="*60
     
+    def referenced_sections(self, results):
+        """Formatted sections cited by the retrieved ones, within the cross-reference budget"""
+        if CROSS_REF_MAX_SECTIONS <= 0 or not hasattr(self.searcher, 'get_cross_references'):
+            return []
+        
+        included = {str(r['metadata'].get('section', '')).upper() for r in results}
+        budget = CROSS_REF_TOKEN_BUDGET
+        parts = []
+        for result in results:
+            section = result['metadata'].get('section')
+            if section is None:
+                continue
+            for reference in self.searcher.get_cross_references(section):
+                if reference in included:
+                    continue
+                if len(parts) >= CROSS_REF_MAX_SECTIONS:
+                    return parts
+                hit = self.searcher.get_section(reference)
+                if hit is None:
+                    continue
+                formatted = f"🔗 Referenced by Section {section}\n" + self.format_ipc_content(hit['content'], hit['metadata'])
+                cost = estimate_tokens(formatted)
+                if cost > budget:
+                    continue
+                budget -= cost
+                included.add(reference)
+                parts.append(formatted)
+        return parts
+    
     def format_ipc_content(self, content, metadata):
         """Format IPC content for better readability"""
         section_num = metadata.get('section', 'N/A')
@@ -92,12 +371,8 @@ class CompleteIPCRAG:
         
         return formatted
     
-    def generate_ipc_answer(self, query, context):
-        """Generate comprehensive IPC answer"""
-        if not self.client:
-            return "IPC legal information service temporarily unavailable."
-        
-        prompt = f"""You are an expert Indian Penal Code (IPC) legal assistant.
+    def ipc_prompt(self, query, context):
+        return f"""You are an expert Indian Penal Code (IPC) legal assistant.
 Provide accurate, comprehensive legal information based ONLY on the provided IPC context.
 
 RULES:
@@ -112,35 +387,314 @@ IPC CONTEXT:{context}
 LEGAL QUESTION: {query}
 
 COMPREHENSIVE IPC ANSWER:"""
+    
+    def generate_ipc_answer(self, query, context, on_token=None, priority=PRIORITY_INTERACTIVE):
+        """Generate comprehensive IPC answer (streamed to on_token if given)"""
+        if not self.client:
+            return LLM_UNAVAILABLE_MESSAGE
         
+        prompt = self.ipc_prompt(query, context)
         try:
-            response = self.client.chat.completions.create(
+            if on_token is None:
+                response = call_llm(lambda: self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.1,
+                    max_tokens=1024
+                ), prompt, 1024, priority)
+                return response.choices[0].message.content
+            
+            stream = call_llm(lambda: self.client.chat.completions.create(
                 model=self.model_name,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.1,
-                max_tokens=1024
-            )
-            return response.choices[0].message.content
+                max_tokens=1024,
+                stream=True
+            ), prompt, 1024, priority)
+            parts = []
+            for chunk in stream:
+                token = chunk.choices[0].delta.content
+                if token:
+                    parts.append(token)
+                    on_token(token)
+            return "".join(parts)
+        except LLMBusyError as e:
+            print(f"⏳ LLM busy: {e}")
+            return LLM_BUSY_MESSAGE
+        except Exception as e:
+            return f"{LLM_ERROR_PREFIX}: {str(e)}"
+    
+    async def generate_ipc_answer_async(self, query, context, on_token=None, priority=PRIORITY_INTERACTIVE):
+        """generate_ipc_answer on the async Groq client"""
+        if self.async_client is None:
+            self.async_client = create_async_client()
+        if not self.async_client:
+            return LLM_UNAVAILABLE_MESSAGE
+        
+        messages = [{"role": "user", "content": self.ipc_prompt(query, context)}]
+        try:
+            return await complete_async(self.async_client, self.model_name, messages, 1024, on_token, priority)
+        except LLMBusyError as e:
+            print(f"⏳ LLM busy: {e}")
+            return LLM_BUSY_MESSAGE
         except Exception as e:
-            return f"Legal information service error: {str(e)}"
+            return f"{LLM_ERROR_PREFIX}: {str(e)}"
+    
+    def ask(self, query, conversation=None, profile=False):
+        """Main method to ask IPC questions.
+        
+        conversation is an optional per-session dict (e.g. in st.session_state)
+        that keeps the previous turn's query and retrieved sections. Waits
+        for the LLM answer however long it takes; use ask_with_deadline()
+        for the extractive fallback.
+        """
+        answer, _ = self.ask_with_deadline(query, conversation, deadline=0, profile=profile)
+        return answer
+    
+    def ask_with_deadline(self, query, conversation=None, deadline=None, profile=False, log=True, trace=None):
+        """Answer within a latency budget.
+        
+        Returns (answer, pending). If the LLM misses the deadline, answer is a
+        labelled extractive answer and pending is a Future for the LLM answer;
+        otherwise pending is None. profile=True (or PROFILE_SAMPLE_RATE /
+        PROFILE_QUERY_MATCH) writes a cProfile + tracemalloc capture; a
+        profiled request searches and generates on the calling thread, without
+        batching, coalescing or the deadline. log=False keeps synthetic
+        traffic (load tests) out of the query log. trace, if given, is filled
+        as in answer_query plus 'profile': the written .prof path or None.
+        """
+        if trace is None:
+            trace = {}
+        trace['profile'] = None
+        start = time.perf_counter()
+        if should_profile(profile, query):
+            with profile_request("ask", query) as capture:
+                answer, pending = self.answer_query(query, conversation, deadline, trace)
+            trace['profile'] = capture and capture['path']
+        else:
+            answer, pending = self.answer_query(query, conversation, deadline, trace)
+        trace['answer'] = answer
+        if log:
+            log_query(query, trace, (time.perf_counter() - start) * 1000)
+        return answer, pending
     
-    def ask(self, query):
-        """Main method to ask IPC questions"""
+    def answer_query(self, query, conversation=None, deadline=None, trace=None):
+        """ask_with_deadline without the profiling hook and query log.
+        
+        trace, if given, is filled with what the query log records: outcome,
+        results, retrieval time and whether a cached/shared answer was used.
+        """
+        if trace is None:
+            trace = {}
         print(f"⚖️ IPC Query: {query}")
         
+        # IPC <-> BNS correspondence is a table lookup, no search or LLM
+        mapping = self.mapping_answer(query) if self.searcher else None
+        if mapping:
+            trace['outcome'] = 'mapping'
+            return mapping, None
+        
         # Check if components are available
         if not self.searcher or not self.client:
+            trace['outcome'] = 'unavailable'
+            return "Complete IPC system not available. Please check if the knowledge base is properly loaded.", None
+        
+        trace['follow_up'] = self.is_follow_up(query, conversation)
+        retrieval_start = time.perf_counter()
+        prompt_query, results = self.retrieve(query, conversation)
+        trace['retrieval_ms'] = (time.perf_counter() - retrieval_start) * 1000
+        trace['results'] = results
+        if not results and self.bootstrapper and self.bootstrapper.is_building():
+            trace['outcome'] = 'bootstrapping'
+            return BOOTSTRAP_ANSWER.format(**self.bootstrapper.status()), None
+        context = self.build_ipc_context(results)
+        if self.has_no_context(context):
+            trace['outcome'] = 'no_context'
+            return NO_CONTEXT_ANSWER, None
+        
+        if is_profiling():
+            # Generate on this thread so the capture shows the LLM call, not a Future wait
+            answer = self.answer_with_context(prompt_query, context)
+            trace['outcome'] = 'answered'
+            return answer, None
+        
+        if deadline is None:
+            deadline = LLM_DEADLINE_SECONDS
+        # Identical in-flight questions share one generation and its streamed tokens
+        key = (normalize_query(prompt_query), result_ids(results), self.model_name)
+        pending, is_leader = self.flights.run(
+            key,
+            lambda flight: self.answer_with_context(prompt_query, context, on_token=flight.emit),
+            self.llm_executor
+        )
+        trace['coalesced'] = not is_leader
+        if not is_leader:
+            print("🤝 Joined an identical in-flight question")
+        try:
+            answer = pending.result(timeout=deadline if deadline > 0 else None)
+            trace['outcome'] = 'answered'
+            return answer, None
+        except FutureTimeout:
+            print(f"⏱️ LLM missed the {deadline}s deadline, returning extractive answer")
+            trace['outcome'] = 'fallback'
+            return self.extractive_answer(results), pending
+    
+    async def ask_async(self, query, conversation=None, on_token=None):
+        """ask() for asyncio servers.
+        
+        Lookups and retrieval run on the shared retrieval executor and the LLM
+        call on the event loop, so a waiting question holds no thread. Tokens
+        are streamed to on_token. Cancelling the task (client disconnected)
+        stops the LLM stream unless an identical question still waits on it.
+        """
+        trace = {}
+        start = time.perf_counter()
+        try:
+            answer = await self.answer_query_async(query, conversation, on_token, trace)
+        except asyncio.CancelledError:
+            trace['outcome'] = 'cancelled'
+            log_query(query, trace, (time.perf_counter() - start) * 1000)
+            raise
+        trace['answer'] = answer
+        log_query(query, trace, (time.perf_counter() - start) * 1000)
+        return answer
+    
+    async def answer_query_async(self, query, conversation=None, on_token=None, trace=None):
+        """answer_query without a deadline: streaming replaces the extractive fallback"""
+        if trace is None:
+            trace = {}
+        print(f"⚖️ IPC Query: {query}")
+        
+        mapping = await run_blocking(self.mapping_answer, query) if self.searcher else None
+        if mapping:
+            trace['outcome'] = 'mapping'
+            return mapping
+        
+        if not self.searcher or not self.client:
+            trace['outcome'] = 'unavailable'
             return "Complete IPC system not available. Please check if the knowledge base is properly loaded."
         
+        trace['follow_up'] = self.is_follow_up(query, conversation)
+        retrieval_start = time.perf_counter()
+        prompt_query, results, context = await run_blocking(self.retrieve_context, query, conversation)
+        trace['retrieval_ms'] = (time.perf_counter() - retrieval_start) * 1000
+        trace['results'] = results
+        if not results and self.bootstrapper and self.bootstrapper.is_building():
+            trace['outcome'] = 'bootstrapping'
+            return BOOTSTRAP_ANSWER.format(**self.bootstrapper.status())
+        if self.has_no_context(context):
+            trace['outcome'] = 'no_context'
+            return NO_CONTEXT_ANSWER
+        
+        print(f"📚 Found relevant context")
+        key = (normalize_query(prompt_query), result_ids(results), self.model_name)
+        answer, is_leader = await self.async_flights.run(
+            key,
+            lambda flight: self.generate_ipc_answer_async(prompt_query, context, on_token=flight.emit),
+            on_token
+        )
+        trace['coalesced'] = not is_leader
+        if not is_leader:
+            print("🤝 Joined an identical in-flight question")
+        trace['outcome'] = 'answered'
+        return answer
+    
+    def retrieve_context(self, query, conversation=None):
+        """retrieve() plus the formatted context, in one executor hop"""
+        prompt_query, results = self.retrieve(query, conversation)
+        return prompt_query, results, self.build_ipc_context(results)
+    
+    def retrieve(self, query, conversation=None):
+        """Search results for a query, plus the question to put in the prompt"""
+        # Follow-ups ("what is its punishment?") reuse the previous turn's sections
+        if self.is_follow_up(query, conversation):
+            print(f"🔗 Follow-up to: {conversation['last_query']}")
+            results = self.follow_up_results(query, conversation)
+            # Capped, so a chain of follow-ups doesn't keep growing the context
+            conversation['last_results'] = results[:RETRIEVAL_K]
+            prompt_query = f"{query}\n(Follow-up to the previous question: {conversation['last_query']})"
+            return prompt_query, results
+        
         # Use comprehensive IPC approach
-        context = self.get_ipc_context(query, k=5)
+        results = self.searcher.search(query, k=RETRIEVAL_K)
+        if conversation is not None:
+            conversation['last_query'] = query
+            conversation['last_results'] = results
+        return query, results
+    
+    def extractive_answer(self, results):
+        """Answer assembled locally from the retrieved sections, without the LLM"""
+        parts = [EXTRACTIVE_ANSWER_LABEL]
+        for result in results[:EXTRACTIVE_MAX_SECTIONS]:
+            if result['score'] <= 0.1:
+                continue
+            metadata = result['metadata']
+            description = extract_field(result['content'], "Description:") or result['content']
+            
+            if 'section' in metadata:
+                heading = f"**IPC Section {metadata['section']}: {metadata.get('section_title', '')}**"
+                if metadata.get('chapter') and metadata.get('chapter_title'):
+                    heading += f"  \n📖 Chapter {metadata['chapter']}: {metadata['chapter_title']}"
+            else:
+                heading = f"**{metadata.get('source', 'Document')}**"
+                if metadata.get('page'):
+                    heading += f" (page {metadata['page']})"
+            parts.append(heading)
+            
+            punishment = extract_punishment(description)
+            if punishment:
+                parts.append(f"⚖️ Punishment: {punishment}")
+            else:
+                parts.append(f"📝 {shorten(description, EXTRACTIVE_SNIPPET_CHARS)}")
         
-        if "No relevant IPC sections" in context or "not available" in context:
-            return "I couldn't find relevant IPC sections for your query. Please try asking about specific IPC sections or crimes."
+        return "\n\n".join(parts)
+    
+    def is_follow_up(self, query, conversation):
+        """Cheap check for an anaphoric follow-up to the previous question"""
+        if not conversation or not conversation.get('last_results'):
+            return False
+        if len(query.split()) > FOLLOWUP_MAX_WORDS:
+            return False
+        if SECTION_NUMBER_PATTERN.search(query):
+            return False
+        if not FOLLOW_UP_PATTERN.search(query):
+            return False
+        # A pronoun is only anaphoric when the question has no subject of its own
+        return all(word in FOLLOW_UP_FILLER_WORDS for word in WORD_PATTERN.findall(query.lower()))
+    
+    def follow_up_results(self, query, conversation):
+        """Previous sections plus any new ones from one search anchored on the previous question"""
+        results = list(conversation['last_results'])
+        if FOLLOWUP_EXTRA_K <= 0:
+            return results
+        
+        seen = {str(r['metadata'].get('section', r['content'])) for r in results}
+        for result in self.searcher.search(f"{conversation['last_query']} {query}", k=FOLLOWUP_EXTRA_K):
+            key = str(result['metadata'].get('section', result['content']))
+            if key not in seen:
+                seen.add(key)
+                results.append(result)
+        return results
+    
+    def has_no_context(self, context):
+        return "No relevant IPC sections" in context or "not available" in context
+    
+    def answer_with_context(self, query, context, on_token=None, priority=PRIORITY_INTERACTIVE):
+        """Generate the answer for an already retrieved context"""
+        if self.has_no_context(context):
+            return NO_CONTEXT_ANSWER
         
         print(f"📚 Found relevant context")
-        answer = self.generate_ipc_answer(query, context)
+        answer = self.generate_ipc_answer(query, context, on_token=on_token, priority=priority)
         return answer
+    
+    def coalescing_stats(self):
+        """How many identical concurrent questions shared one generation"""
+        return self.flights.stats()
+    
+    def async_coalescing_stats(self):
+        """coalescing_stats() for ask_async, plus generations cancelled after disconnects"""
+        return self.async_flights.stats()
 
 def test_complete_ipc():
     """Test the complete IPC RAG system"""
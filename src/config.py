@@ -14,12 +14,134 @@ GROQ_MODEL = "llama-3.1-8b-instant"  # Updated model - fast and free
 # Embeddings Configuration
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
+# Local embedding model snapshots (src/model_store.py), loaded with hub access disabled
+MODEL_SNAPSHOT_DIR = os.getenv("MODEL_SNAPSHOT_DIR", "knowledge_base/models")
+# Fail instead of downloading from the Hugging Face hub when no snapshot exists
+MODEL_OFFLINE = os.getenv("MODEL_OFFLINE", "0") == "1"
+MODEL_VERIFY_SNAPSHOT = True  # re-hash snapshot files on load
+
 # FAISS Configuration
 FAISS_DIRECTORY = "knowledge_base/faiss_db"
 
+# LangChain Chroma store written by src/database_builder.py
+PERSIST_DIRECTORY = "knowledge_base/langchain_chroma"
+
+# Build a missing/stale IPC knowledge base in the background on app startup
+KB_BOOTSTRAP = os.getenv("KB_BOOTSTRAP", "1") == "1"
+
+# Knowledge base versioning and hot-swap
+KB_KEEP_VERSIONS = 3
+KB_VERIFY_CHECKSUMS = True
+# Seconds between checks for a newly published KB version (0 disables the watcher)
+KB_WATCH_INTERVAL = float(os.getenv("KB_WATCH_INTERVAL", "10"))
+
+# Memory-budget mode for small containers: release the encoder after
+# MODEL_IDLE_SECONDS without a search and reload it on the next query
+MEMORY_BUDGET_MODE = os.getenv("MEMORY_BUDGET_MODE", "0") == "1"
+MODEL_IDLE_SECONDS = float(os.getenv("MODEL_IDLE_SECONDS", "600"))
+# Memory-map index.faiss instead of reading it into RAM; in memory-budget
+# mode a mapped index is released along with the encoder
+INDEX_MMAP = os.getenv("INDEX_MMAP", "0") == "1"
+
+# Query micro-batching: concurrent searches are encoded and searched together
+SEARCH_BATCHING = os.getenv("SEARCH_BATCHING", "1") == "1"
+SEARCH_BATCH_MAX_WAIT_MS = float(os.getenv("SEARCH_BATCH_MAX_WAIT_MS", "5"))
+SEARCH_BATCH_MAX_SIZE = int(os.getenv("SEARCH_BATCH_MAX_SIZE", "32"))
+
+# Coarse-to-fine search over chapter/document centroids
+HIERARCHICAL_SEARCH = os.getenv("HIERARCHICAL_SEARCH", "1") == "1"
+HIERARCHICAL_TOP_GROUPS = 3
+# Fall through to flat search when kept/dropped group scores are this close
+HIERARCHICAL_MARGIN = 0.02
+# Below this many vectors a flat scan is already cheap; the shipped KBs
+# (~575 and ~2150 vectors) stay on flat search
+HIERARCHICAL_MIN_VECTORS = int(os.getenv("HIERARCHICAL_MIN_VECTORS", "5000"))
+
+# Shared retrieval server (src/retrieval_server.py); unset = search in-process
+RETRIEVAL_SERVER_URL = os.getenv("RETRIEVAL_SERVER_URL")
+RETRIEVAL_SERVER_HOST = os.getenv("RETRIEVAL_SERVER_HOST", "127.0.0.1")
+RETRIEVAL_SERVER_PORT = int(os.getenv("RETRIEVAL_SERVER_PORT", "8765"))
+RETRIEVAL_TIMEOUT = 30
+
+# Bulk answering (src/batch_answer.py)
+BATCH_ANSWER_CONCURRENCY = int(os.getenv("BATCH_ANSWER_CONCURRENCY", "4"))
+BATCH_RETRIEVAL_SIZE = 32
+
+# Chat history (app.py)
+HISTORY_PAGE_SIZE = 20  # messages shown per "load earlier" page
+MAX_HISTORY_MESSAGES = 200
+MAX_HISTORY_CHARS = 200_000
+SESSION_IDLE_TIMEOUT = 30 * 60  # seconds before an idle session's history is dropped
+
+# Follow-up questions reuse the previous turn's sections
+FOLLOWUP_MAX_WORDS = 12
+FOLLOWUP_EXTRA_K = 2  # sections added by one incremental search (0 disables)
+
+# Sections cited by retrieved ones ("punishable under section 34") added to context
+CROSS_REF_MAX_SECTIONS = 3
+CROSS_REF_TOKEN_BUDGET = 400
+
+# Latency budget: past this, ask_with_deadline() returns an extractive answer
+# (0 waits forever; ask() always waits)
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "8"))
+# How long the UI keeps waiting to replace the extractive answer
+LLM_LATE_ANSWER_TIMEOUT = 60
+LLM_MAX_WORKERS = 16
+# ask_async(): threads for encode/search; LLM waits happen on the event loop
+ASYNC_RETRIEVAL_WORKERS = int(os.getenv("ASYNC_RETRIEVAL_WORKERS", "4"))
+
+# Client-side LLM rate limiting (match these to the Groq quota of the API key)
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "20000"))
+LLM_QUEUE_MAX = 64  # waiting calls beyond this are told the service is busy
+LLM_QUEUE_TIMEOUT = 20  # seconds an interactive call may wait for quota
+LLM_RATE_LIMIT_BACKOFF = 10  # seconds to pause after the API answers 429
+
+# IPC <-> BNS correspondence table, built with the IPC knowledge base
+BNS_PDF_PATH = "data/ipc/a2023-45.pdf"
+BNS_REVIEWED_PATH = "data/ipc/ipc_bns_reviewed.json"  # optional {"ipc": "bns"} pairs
+BNS_MATCH_THRESHOLD = 0.75  # embedding matches below this stay review-only candidates
+BNS_CANDIDATES = 3
+
+# Structured query log (src/query_log.py), written by a background thread.
+# On by default: it stores users' normalized questions in QUERY_LOG_PATH
+# (logs/ is git-ignored); set QUERY_LOG_ENABLED=0 where that is not acceptable.
+QUERY_LOG_ENABLED = os.getenv("QUERY_LOG_ENABLED", "1") == "1"
+QUERY_LOG_PATH = os.getenv("QUERY_LOG_PATH", "logs/queries.jsonl")
+QUERY_LOG_MAX_BYTES = 5 * 1024 * 1024  # rotate the active file past this size
+QUERY_LOG_BACKUPS = 5  # rotated files kept (queries.jsonl.1 ... .5)
+QUERY_LOG_QUEUE_MAX = 10000  # records waiting to be written; extra ones are dropped
+
+# Per-request profiling (src/profiling.py): cProfile + tracemalloc dumps
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # fraction of requests, 0 = off
+PROFILE_QUERY_MATCH = os.getenv("PROFILE_QUERY_MATCH")  # regex: always profile matching queries
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_KEEP = 20  # newest captures kept; older ones are deleted
+PROFILE_TRACE_FRAMES = 5
+PROFILE_UI = os.getenv("PROFILE_UI", "0") == "1"  # show the profiling toggle in app.py
+
 # Document Processing Configuration
 CHUNK_SIZE = 800
 CHUNK_OVERLAP = 150
+# all-MiniLM-L6-v2 truncates at 256 word pieces; leave headroom for special tokens
+MAX_CHUNK_TOKENS = 240
+
+# PDF text extraction cache (per-page text keyed by file hash)
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", "knowledge_base/.extraction_cache")
+
+# Near-duplicate chunk removal (shingle containment) at build time
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1") == "1"
+# Share of a chunk's shingles already in one earlier passage (a chunk and its
+# neighbours) for the chunk to be collapsed into it
+DEDUP_THRESHOLD = 0.8
+DEDUP_SHINGLE_SIZE = 24  # characters, whitespace and punctuation removed
+DEDUP_SAMPLE = 4  # keep 1 in N shingle hashes (by value) to bound memory
 
 # Supported Document Formats
-SUPPORTED_EXTENSIONS = ['.pdf', '.txt', '.docx']
\ No newline at end of file
+SUPPORTED_EXTENSIONS = ['.pdf', '.txt', '.docx']
+
+# Embedding Pipeline Configuration
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", str(os.cpu_count() or 1)))
+# Below this many texts a worker pool costs more to start than it saves
+EMBED_MIN_PARALLEL_TEXTS = 2000
@@ -0,0 +1,57 @@
+import re
+
+# "section 34", "sections 87, 88 and 89", "sections 255 to 263", "section 326A";
+# not "sub-section (2)" / "sub -section 2", which points inside the same section
+REFERENCE_PATTERN = re.compile(
+    r"(?<!sub-)(?<!sub )(?<!sub -)(?<!sub- )\bsections?\s*(\d+[A-Z]{0,3}(?:\s*(?:,|and|or|to)\s*(?:sections?\s*)?\d+[A-Z]{0,3})*)",
+    re.IGNORECASE
+)
+NUMBER_PATTERN = re.compile(r"(\d+)([A-Z]{0,3})", re.IGNORECASE)
+# "... of the Code of Criminal Procedure" points outside the IPC
+OTHER_ACT_PATTERN = re.compile(r"\s*,?\s*of\s+the\s+(?!Indian\s+Penal\s+Code)", re.IGNORECASE)
+# Footnote markers glued to the word, e.g. "section1 376AB"
+FOOTNOTE_PATTERN = re.compile(r"\b(sections?)\d\s+(?=\d)", re.IGNORECASE)
+MAX_RANGE = 10
+
+
+def section_key(section):
+    return str(section).strip().upper()
+
+
+def extract_references(text, known_sections, own_section=None):
+    """Section numbers of this Code mentioned in a provision, in order of appearance"""
+    references = []
+    text = FOOTNOTE_PATTERN.sub(r"\1 ", text)
+    for match in REFERENCE_PATTERN.finditer(text):
+        if OTHER_ACT_PATTERN.match(text, match.end()):
+            continue
+
+        span = match.group(1)
+        numbers = NUMBER_PATTERN.findall(span)
+        keys = [section_key(num + suffix) for num, suffix in numbers]
+
+        # Expand short numeric ranges: "sections 255 to 263"
+        if re.search(r"\bto\b", span, re.IGNORECASE) and len(numbers) == 2 and not any(s for _, s in numbers):
+            low, high = int(numbers[0][0]), int(numbers[1][0])
+            if 0 < high - low <= MAX_RANGE:
+                keys = [str(n) for n in range(low, high + 1)]
+
+        for key in keys:
+            if key in known_sections and key != own_section and key not in references:
+                references.append(key)
+    return references
+
+
+def build_cross_reference_graph(ipc_data):
+    """Map each section to the sections its description refers to"""
+    known_sections = {section_key(section['Section']) for section in ipc_data}
+    graph = {}
+    for section in ipc_data:
+        own = section_key(section['Section'])
+        references = extract_references(section['section_desc'], known_sections, own)
+        if references:
+            graph[own] = references
+
+    edge_count = sum(len(refs) for refs in graph.values())
+    print(f"🔗 Extracted {edge_count} cross-references from {len(graph)} sections")
+    return graph
@@ -0,0 +1,131 @@
+import re
+import sys
+import zlib
+from collections import Counter
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import DEDUP_THRESHOLD, DEDUP_SHINGLE_SIZE, DEDUP_SAMPLE
+
+# PDF extraction splits words at random ("impriso nment", "sect ions"), so
+# shingles are taken over the text with all spacing and punctuation removed
+NON_WORD_PATTERN = re.compile(r'[\W_]+')
+# Provenance fields carried over from collapsed duplicates
+PROVENANCE_FIELDS = ("source", "page", "page_end", "chunk_index", "start_char", "end_char")
+
+
+def shingle_hashes(text, size=None, sample=None):
+    """Hashes of overlapping character n-grams, keeping those divisible by `sample`.
+
+    Sampling by hash value keeps the same shingles in every chunk, so
+    containment between chunks is still estimated without bias.
+    """
+    if size is None:
+        size = DEDUP_SHINGLE_SIZE
+    if sample is None:
+        sample = DEDUP_SAMPLE
+    compact = NON_WORD_PATTERN.sub('', text.lower())
+    if len(compact) <= size:
+        return {zlib.crc32(compact.encode('utf-8'))} if compact else set()
+    hashes = (zlib.crc32(compact[i:i + size].encode('utf-8')) for i in range(len(compact) - size + 1))
+    return {h for h in hashes if h % sample == 0}
+
+
+def chunk_position(metadata):
+    """(document, chunk number), or None when the chunk's place is unknown"""
+    if metadata.get('chunk_index') is None:
+        return None
+    return metadata.get('doc_index', metadata.get('source')), metadata['chunk_index']
+
+
+def adjacent(a, b):
+    """Consecutive windows of one document overlap by design (CHUNK_OVERLAP)"""
+    return a is not None and b is not None and a[0] == b[0] and abs(a[1] - b[1]) <= 1
+
+
+def find_duplicate_clusters(texts, metadatas, threshold=None):
+    """Root row for every row: itself, or the earlier chunk it duplicates.
+
+    A chunk is a duplicate when at least `threshold` of its shingles occur
+    in one earlier passage: a kept chunk plus its neighbouring windows, since
+    the same text is windowed at different offsets in different documents.
+    Shared boilerplate scattered over many chunks does not count, and neither
+    does the overlap with the chunk's own neighbours.
+    """
+    if threshold is None:
+        threshold = DEDUP_THRESHOLD
+
+    positions = [chunk_position(metadata) for metadata in metadatas]
+    first_seen = {}  # shingle hash -> first kept row containing it
+    roots = []
+    for row, text in enumerate(texts):
+        hashes = shingle_hashes(text)
+        own_overlap = 0
+        earlier = Counter()
+        for h in hashes:
+            other = first_seen.get(h)
+            if other is None:
+                continue
+            if adjacent(positions[row], positions[other]):
+                own_overlap += 1
+            else:
+                earlier[other] += 1
+
+        root = row
+        compared = len(hashes) - own_overlap
+        if compared > 0 and earlier:
+            best = earlier.most_common(1)[0][0]
+            covered = sum(
+                count for other, count in earlier.items()
+                if other == best or adjacent(positions[best], positions[other])
+            )
+            if covered / compared >= threshold:
+                root = best
+
+        roots.append(root)
+        if root == row:
+            for h in hashes:
+                first_seen.setdefault(h, row)
+    return roots
+
+
+def dedupe_chunks(texts, metadatas, dimension=None, threshold=None):
+    """Collapse near-duplicate chunks into one entry with merged provenance"""
+    roots = find_duplicate_clusters(texts, metadatas, threshold)
+
+    kept_texts = []
+    kept_metadatas = []
+    position = {}
+    for row, root in enumerate(roots):
+        if root == row:
+            position[row] = len(kept_texts)
+            kept_texts.append(texts[row])
+            kept_metadatas.append(dict(metadatas[row]))
+        else:
+            representative = kept_metadatas[position[root]]
+            representative.setdefault('duplicates', []).append(
+                {field: metadatas[row][field] for field in PROVENANCE_FIELDS if field in metadatas[row]}
+            )
+
+    for metadata in kept_metadatas:
+        metadata['duplicate_count'] = len(metadata.get('duplicates', []))
+
+    removed = len(texts) - len(kept_texts)
+    removed_text_bytes = sum(
+        len(texts[row].encode('utf-8')) for row, root in enumerate(roots) if root != row
+    )
+    report = {
+        'input_chunks': len(texts),
+        'kept_chunks': len(kept_texts),
+        'removed_vectors': removed,
+        'removed_text_bytes': removed_text_bytes,
+        'removed_vector_bytes': removed * dimension * 4 if dimension else None
+    }
+
+    saved = f"{removed} vectors, {removed_text_bytes / 1024:.1f} KB of text"
+    if dimension:
+        saved += f", {removed * dimension * 4 / 1024:.1f} KB of index"
+    share = removed / len(texts) * 100 if texts else 0.0
+    print(f"🧹 Near-duplicate removal: {len(texts)} → {len(kept_texts)} chunks, -{share:.1f}% (saved {saved})")
+    return kept_texts, kept_metadatas, report
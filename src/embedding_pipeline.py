@@ -0,0 +1,49 @@
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import EMBED_BATCH_SIZE, EMBED_WORKERS, EMBED_MIN_PARALLEL_TEXTS
+
+
+def encode_texts(model, texts, batch_size=None, workers=None):
+    """Encode texts in length-sorted batches, sharded across CPU worker processes"""
+    import numpy as np
+
+    if batch_size is None:
+        batch_size = EMBED_BATCH_SIZE
+    if workers is None:
+        workers = EMBED_WORKERS
+
+    if not texts:
+        return np.zeros((0, model.get_sentence_embedding_dimension()), dtype='float32')
+
+    # Sort by length so each batch pads to a similar sequence length
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    sorted_texts = [texts[i] for i in order]
+
+    start = time.perf_counter()
+    if workers > 1 and len(texts) >= EMBED_MIN_PARALLEL_TEXTS:
+        print(f"🧵 Encoding {len(texts)} texts on {workers} CPU workers (batch size {batch_size})...")
+        pool = model.start_multi_process_pool(['cpu'] * workers)
+        try:
+            # Each worker receives whole length-sorted slices, keeping padding low
+            chunk_size = max(batch_size, -(-len(texts) // (workers * 4)))
+            sorted_embeddings = model.encode_multi_process(
+                sorted_texts, pool, batch_size=batch_size, chunk_size=chunk_size
+            )
+        finally:
+            model.stop_multi_process_pool(pool)
+    else:
+        print(f"🧮 Encoding {len(texts)} texts in one process (batch size {batch_size})...")
+        sorted_embeddings = model.encode(sorted_texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+
+    # Restore the caller's ordering
+    embeddings = np.empty_like(sorted_embeddings, dtype='float32')
+    embeddings[order] = sorted_embeddings
+
+    rate = len(texts) / elapsed if elapsed > 0 else float('inf')
+    print(f"⚡ Encoded {len(texts)} texts in {elapsed:.1f}s ({rate:.1f} texts/sec)")
+    return embeddings
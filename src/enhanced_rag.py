@@ -3,14 +3,17 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent))
 
-from src.faiss_search import FAISSSearch
+from src.retrieval_client import create_searcher
 from src.config import GROQ_API_KEY, GROQ_MODEL
+from src.rate_limiter import call_llm, LLMBusyError, LLM_BUSY_MESSAGE
+from src.async_pipeline import run_blocking, create_async_client, complete_async
 import groq
 
 class EnhancedRAG:
     def __init__(self):
-        self.searcher = FAISSSearch()
+        self.searcher = create_searcher()
         self.client = None
+        self.async_client = None
         self.model_name = GROQ_MODEL
         self.setup_groq()
     
@@ -46,12 +49,8 @@ class EnhancedRAG:
             content = content[:800] + "..."
         return content
     
-    def generate_answer(self, query, context):
-        """Generate answer using Groq with better prompting"""
-        if not self.client:
-            return "Error: Groq client not available."
-        
-        prompt = f"""You are an AI legal assistant for Indian laws and government schemes. Use the provided context to answer the user's question.
+    def answer_prompt(self, query, context):
+        return f"""You are an AI legal assistant for Indian laws and government schemes. Use the provided context to answer the user's question.
 
 Follow these rules:
 1. Answer based ONLY on the provided context
@@ -65,15 +64,40 @@ CONTEXT:{context}
 USER QUESTION: {query}
 
 ANSWER:"""
+    
+    def generate_answer(self, query, context):
+        """Generate answer using Groq with better prompting"""
+        if not self.client:
+            return "Error: Groq client not available."
         
+        prompt = self.answer_prompt(query, context)
         try:
-            response = self.client.chat.completions.create(
+            response = call_llm(lambda: self.client.chat.completions.create(
                 model=self.model_name,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.1,
                 max_tokens=1024
-            )
+            ), prompt, 1024)
             return response.choices[0].message.content
+        except LLMBusyError as e:
+            print(f"⏳ LLM busy: {e}")
+            return LLM_BUSY_MESSAGE
+        except Exception as e:
+            return f"Error: {str(e)}"
+    
+    async def generate_answer_async(self, query, context, on_token=None):
+        """generate_answer on the async Groq client, streamed to on_token if given"""
+        if self.async_client is None:
+            self.async_client = create_async_client()
+        if not self.async_client:
+            return "Error: Groq client not available."
+        
+        messages = [{"role": "user", "content": self.answer_prompt(query, context)}]
+        try:
+            return await complete_async(self.async_client, self.model_name, messages, 1024, on_token)
+        except LLMBusyError as e:
+            print(f"⏳ LLM busy: {e}")
+            return LLM_BUSY_MESSAGE
         except Exception as e:
             return f"Error: {str(e)}"
     
@@ -92,6 +116,20 @@ ANSWER:"""
         # Generate answer
         answer = self.generate_answer(query, context)
         return answer
+    
+    async def ask_async(self, query, k=5, on_token=None):
+        """ask() for asyncio servers: retrieval runs on the shared executor and
+        the LLM call on the event loop; cancelling the task stops the stream"""
+        print(f"🤔 Question: {query}")
+        
+        context = await run_blocking(self.get_context, query, k=k)
+        relevant_sources = len(context.split("DOCUMENT")) - 1
+        print(f"📚 Found {relevant_sources} relevant document(s)")
+        
+        if relevant_sources == 0:
+            return "I couldn't find relevant information in my knowledge base about this topic."
+        
+        return await self.generate_answer_async(query, context, on_token)
 
 def test_enhanced_rag():
     """Test the enhanced RAG pipeline"""
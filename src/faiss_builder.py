@@ -1,17 +1,40 @@
-import os
 import sys
-import pickle
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent))
 
+def publish_faiss_index(kb_dir, texts, metadatas, embeddings, model_hash=None, dedup_report=None):
+    """Index embeddings for cosine search and publish them as a new KB version"""
+    import faiss
+    from src.kb_store import publish_kb, data_sources
+    from src.hierarchical_index import build_groups
+    
+    dimension = embeddings.shape[1]
+    index = faiss.IndexFlatIP(dimension)  # Inner product (cosine similarity)
+    
+    # Normalize embeddings for cosine similarity
+    faiss.normalize_L2(embeddings)
+    index.add(embeddings)
+    
+    # Write a new version and atomically publish it; running apps pick it up
+    print("💾 Saving knowledge base...")
+    publish_kb(kb_dir, index, texts, metadatas, sources=data_sources(), model_hash=model_hash, extra={
+        'groups': build_groups(embeddings, metadatas),
+        'dedup': dedup_report
+    })
+    return index
+
 def build_faiss_knowledge_base():
     """Build knowledge base using FAISS instead of ChromaDB"""
     print("🚀 Starting FAISS Knowledge Base Construction...")
     
     try:
         from utils.file_handlers import load_documents
-        from sentence_transformers import SentenceTransformer
+        from src.embedding_pipeline import encode_texts
+        from src.chunker import chunk_documents
+        from src.dedup import dedupe_chunks
+        from src.config import DEDUP_ENABLED
+        from src.model_store import load_embedding_model
         import faiss
         import numpy as np
     except ImportError as e:
@@ -31,7 +54,7 @@ def build_faiss_knowledge_base():
     # Step 2: Initialize embeddings model
     print("🔤 Loading embeddings model...")
     try:
-        model = SentenceTransformer('all-MiniLM-L6-v2')
+        model, model_hash = load_embedding_model()
         print("✅ Embedding model loaded!")
     except Exception as e:
         print(f"❌ Failed to load model: {e}")
@@ -39,24 +62,8 @@ def build_faiss_knowledge_base():
     
     # Step 3: Create chunks from documents
     print("✂️ Creating document chunks...")
-    all_texts = []
-    all_metadatas = []
-    
-    for doc_idx, doc in enumerate(raw_documents):
-        content = doc['content']
-        
-        # Simple chunking - split by paragraphs
-        paragraphs = [p.strip() for p in content.split('\n\n') if p.strip() and len(p.strip()) > 100]
-        
-        for para_idx, paragraph in enumerate(paragraphs):
-            all_texts.append(paragraph)
-            all_metadatas.append({
-                "source": os.path.basename(doc['source']),
-                "doc_index": doc_idx,
-                "chunk_index": para_idx,
-                "type": doc['type'],
-                "full_source": doc['source']
-            })
+    # Token-bounded chunks with CHUNK_SIZE / CHUNK_OVERLAP from config
+    all_texts, all_metadatas = chunk_documents(raw_documents)
     
     print(f"📦 Created {len(all_texts)} chunks from documents")
     
@@ -64,35 +71,22 @@ def build_faiss_knowledge_base():
         print("❌ No valid chunks created!")
         return
     
+    # Collapse repeated headers/boilerplate/near-identical provisions
+    dedup_report = None
+    if DEDUP_ENABLED:
+        all_texts, all_metadatas, dedup_report = dedupe_chunks(
+            all_texts, all_metadatas, dimension=model.get_sentence_embedding_dimension()
+        )
+    
     # Step 4: Generate embeddings
     print("🧮 Generating embeddings...")
-    embeddings = model.encode(all_texts)
+    embeddings = encode_texts(model, all_texts)
     print(f"✅ Generated {len(embeddings)} embeddings")
     
-    # Step 5: Create FAISS index
+    # Step 5 + 6: Create the FAISS index and publish it
     print("🗄️ Creating FAISS index...")
-    dimension = embeddings.shape[1]
-    index = faiss.IndexFlatIP(dimension)  # Inner product (cosine similarity)
-    
-    # Normalize embeddings for cosine similarity
-    faiss.normalize_L2(embeddings)
-    index.add(embeddings)
-    
-    # Step 6: Save everything
-    print("💾 Saving knowledge base...")
     kb_dir = Path("knowledge_base/faiss_db")
-    kb_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Save FAISS index
-    faiss.write_index(index, str(kb_dir / "index.faiss"))
-    
-    # Save metadata and texts
-    with open(kb_dir / "metadata.pkl", 'wb') as f:
-        pickle.dump({
-            'texts': all_texts,
-            'metadatas': all_metadatas,
-            'dimension': dimension
-        }, f)
+    index = publish_faiss_index(kb_dir, all_texts, all_metadatas, embeddings, model_hash, dedup_report)
     
     print(f"✅ FAISS knowledge base built successfully!")
     print(f"📍 Location: {kb_dir}")
@@ -3,14 +3,17 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent))
 
-from src.faiss_search import FAISSSearch
+from src.retrieval_client import create_searcher
 from src.config import GROQ_API_KEY, GROQ_MODEL
+from src.rate_limiter import call_llm, LLMBusyError, LLM_BUSY_MESSAGE
+from src.async_pipeline import run_blocking, create_async_client, complete_async
 import groq
 
 class FAISSRAG:
     def __init__(self):
-        self.searcher = FAISSSearch()
+        self.searcher = create_searcher()
         self.client = None
+        self.async_client = None
         self.model_name = GROQ_MODEL
         self.setup_groq()
     
@@ -36,11 +39,7 @@ class FAISSRAG:
         
         return "\n\n".join(context_parts)
     
-    def generate_answer(self, query, context):
-        """Generate answer using Groq"""
-        if not self.client:
-            return "Error: Groq client not available. Please check your API key."
-        
+    def answer_messages(self, query, context):
         prompt = f"""You are a helpful legal assistant for Indian laws and government schemes. 
 Answer the user's question based ONLY on the provided context from official documents. 
 If the context doesn't contain the answer, say "I don't have enough information about this in my knowledge base."
@@ -51,21 +50,48 @@ CONTEXT:
 QUESTION: {query}
 
 ANSWER:"""
+        return [
+            {
+                "role": "system", 
+                "content": "You are a precise legal assistant that provides accurate information about Indian laws and government schemes. Only use information from the provided context. If the context doesn't contain the answer, clearly state this."
+            },
+            {"role": "user", "content": prompt}
+        ]
+    
+    def generate_answer(self, query, context):
+        """Generate answer using Groq"""
+        if not self.client:
+            return "Error: Groq client not available. Please check your API key."
         
+        messages = self.answer_messages(query, context)
         try:
-            response = self.client.chat.completions.create(
+            response = call_llm(lambda: self.client.chat.completions.create(
                 model=self.model_name,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are a precise legal assistant that provides accurate information about Indian laws and government schemes. Only use information from the provided context. If the context doesn't contain the answer, clearly state this."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
+                messages=messages,
                 temperature=0.1,
                 max_tokens=1024
-            )
+            ), messages[-1]["content"], 1024)
             return response.choices[0].message.content
+        except LLMBusyError as e:
+            print(f"⏳ LLM busy: {e}")
+            return LLM_BUSY_MESSAGE
+        except Exception as e:
+            return f"Error generating answer: {str(e)}"
+    
+    async def generate_answer_async(self, query, context, on_token=None):
+        """generate_answer on the async Groq client, streamed to on_token if given"""
+        if self.async_client is None:
+            self.async_client = create_async_client()
+        if not self.async_client:
+            return "Error: Groq client not available. Please check your API key."
+        
+        try:
+            return await complete_async(
+                self.async_client, self.model_name, self.answer_messages(query, context), 1024, on_token
+            )
+        except LLMBusyError as e:
+            print(f"⏳ LLM busy: {e}")
+            return LLM_BUSY_MESSAGE
         except Exception as e:
             return f"Error generating answer: {str(e)}"
     
@@ -80,6 +106,16 @@ ANSWER:"""
         # Generate answer
         answer = self.generate_answer(query, context)
         return answer
+    
+    async def ask_async(self, query, k=3, on_token=None):
+        """ask() for asyncio servers: retrieval runs on the shared executor and
+        the LLM call on the event loop; cancelling the task stops the stream"""
+        print(f"🤔 Question: {query}")
+        
+        context = await run_blocking(self.get_context, query, k=k)
+        print(f"📚 Found relevant context from {len(context.split('Source:')) - 1} sources")
+        
+        return await self.generate_answer_async(query, context, on_token)
 
 def test_rag():
     """Test the RAG pipeline"""
@@ -1,86 +1,438 @@
 import sys
+import time
+import threading
 from pathlib import Path
 import pickle
 
 sys.path.append(str(Path(__file__).parent.parent))
 
+from src.config import (
+    KB_WATCH_INTERVAL,
+    SEARCH_BATCHING,
+    SEARCH_BATCH_MAX_WAIT_MS,
+    SEARCH_BATCH_MAX_SIZE,
+    HIERARCHICAL_SEARCH,
+    HIERARCHICAL_MIN_VECTORS,
+    MEMORY_BUDGET_MODE,
+    MODEL_IDLE_SECONDS,
+    INDEX_MMAP
+)
+from src.kb_store import resolve_kb_dir, read_pointer, read_manifest, verify_version
+from src.hierarchical_index import coarse_to_fine_search
+from src.profiling import should_profile, profile_request, is_profiling
+from src.model_store import load_embedding_model, short_model_name
+from src.bns_mapping import equivalents
+from src.memory_budget import rss_mb, release_freed_memory
+from src.section_suggest import NUMBER_QUERY_PATTERN, normalize
+
+def index_vectors(index):
+    """The stored vectors of a flat index as an (ntotal, d) array.
+
+    For IndexFlat this is a view of the index's own (possibly memory-mapped)
+    storage, valid while the index is alive: the KB dict keeps both together.
+    Other index types fall back to a reconstructed copy.
+    """
+    import faiss
+
+    if isinstance(index, faiss.IndexFlat):
+        try:
+            return faiss.rev_swig_ptr(index.get_xb(), index.ntotal * index.d).reshape(index.ntotal, index.d)
+        except AttributeError:
+            pass
+    return index.reconstruct_n(0, index.ntotal)
+
 class FAISSSearch:
     def __init__(self):
-        self.index = None
-        self.texts = None
-        self.metadatas = None
-        self.model = None
+        # Everything a query needs lives in one snapshot dict that is swapped
+        # as a whole, so in-flight searches never see a half-updated KB
+        self.kb = None
+        self.kb_path = None
         self.loaded = False
-        
+        self._swap_lock = threading.Lock()
+        self._watcher = None
+        self._stop_watching = threading.Event()
+        self._batcher = None
+        self._batcher_lock = threading.Lock()
+        self.search_counts = {'hierarchical': 0, 'flat': 0}
+        # Memory-budget mode: encoder/index released while idle, reloaded on demand
+        self.last_used = time.monotonic()
+        self._resident_lock = threading.Lock()
+        self._idle_thread = None
+        self._stop_idle = threading.Event()
+        self.memory_counts = {'releases': 0, 'reloads': 0, 'model_free_lookups': 0}
+
+    @property
+    def index(self):
+        return self.kb['index'] if self.kb else None
+
+    @property
+    def texts(self):
+        return self.kb['texts'] if self.kb else None
+
+    @property
+    def metadatas(self):
+        return self.kb['metadatas'] if self.kb else None
+
+    @property
+    def model(self):
+        return self.kb['model'] if self.kb else None
+
+    @property
+    def version(self):
+        return self.kb['version'] if self.kb else None
+
+    def _load_index(self, kb_dir, groups):
+        """(index, groups, vectors); groups is None when hierarchical search is off"""
+        import faiss
+
+        path = str(kb_dir / "index.faiss")
+        index = faiss.read_index(path, faiss.IO_FLAG_MMAP) if INDEX_MMAP else faiss.read_index(path)
+
+        # Coarse-to-fine search scores raw vectors of the selected groups only
+        vectors = None
+        if HIERARCHICAL_SEARCH and groups and index.ntotal >= HIERARCHICAL_MIN_VECTORS:
+            vectors = index_vectors(index)
+        else:
+            groups = None
+        return index, groups, vectors
+
+    def _read_kb(self, kb_path):
+        """Read the published KB version from disk without touching the live one"""
+        kb_dir, version = resolve_kb_dir(kb_path)
+        if not kb_dir.exists():
+            raise FileNotFoundError(f"Knowledge base not found at: {kb_path}")
+
+        manifest = read_manifest(kb_dir) if version else None
+        if manifest:
+            ok, reason = verify_version(kb_dir, manifest)
+            if not ok:
+                raise ValueError(f"version {version} failed verification: {reason}")
+
+        # Load metadata and texts
+        with open(kb_dir / "metadata.pkl", 'rb') as f:
+            data = pickle.load(f)
+
+        index, groups, vectors = self._load_index(kb_dir, data.get('groups'))
+
+        # Reuse the loaded (or idle-released) encoder unless the new version was built with another one;
+        # a KB that records a snapshot hash only loads with that exact snapshot
+        model_name = short_model_name(manifest.get('model') if manifest else None)
+        expected_hash = manifest.get('model_hash') if manifest else None
+        if self.kb and self.kb['model_name'] == model_name and (
+                expected_hash is None or self.kb['model_hash'] == expected_hash):
+            model, model_hash = self.kb['model'], self.kb['model_hash']
+        else:
+            model, model_hash = load_embedding_model(model_name, expected_hash)
+
+        # Exact section number -> row, for direct lookups without embedding
+        section_lookup = {}
+        for idx, metadata in enumerate(data['metadatas']):
+            if 'section' in metadata:
+                section_lookup.setdefault(str(metadata['section']).upper(), idx)
+
+        return {
+            'index': index,
+            'groups': groups,
+            'vectors': vectors,
+            'texts': data['texts'],
+            'metadatas': data['metadatas'],
+            'section_lookup': section_lookup,
+            'data': data,
+            'model': model,
+            'model_name': model_name,
+            'model_hash': model_hash,
+            'version': version,
+            'manifest': manifest,
+            'path': kb_dir
+        }
+
     def load_knowledge_base(self, kb_path=None):
         """Load the FAISS knowledge base with optional path"""
         try:
-            import faiss
-            from sentence_transformers import SentenceTransformer
-            
             if kb_path is None:
                 kb_path = "knowledge_base/faiss_db"
             
-            kb_dir = Path(kb_path)
-            if not kb_dir.exists():
+            if not Path(kb_path).exists():
                 print(f"❌ Knowledge base not found at: {kb_path}")
                 return False
             
-            # Load FAISS index
-            self.index = faiss.read_index(str(kb_dir / "index.faiss"))
-            
-            # Load metadata and texts
-            with open(kb_dir / "metadata.pkl", 'rb') as f:
-                data = pickle.load(f)
-                self.texts = data['texts']
-                self.metadatas = data['metadatas']
-            
-            # Load model
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
+            kb = self._read_kb(kb_path)
+            with self._swap_lock:
+                self.kb = kb
+                self.kb_path = kb_path
             
             self.loaded = True
             print(f"✅ Knowledge base loaded from: {kb_path}")
-            print(f"   Sections available: {len(self.texts)}")
+            if kb['version']:
+                print(f"   Version: {kb['version']}")
+            print(f"   Sections available: {len(kb['texts'])}")
+            if MEMORY_BUDGET_MODE:
+                self.start_idle_unloader()
             return True
             
         except Exception as e:
             print(f"❌ Failed to load knowledge base from {kb_path}: {e}")
             return False
+
+    def check_for_update(self):
+        """Load a newly published KB version and swap it in; returns True on swap"""
+        if not self.kb_path:
+            return False
+        version = read_pointer(self.kb_path)
+        if version is None or version == self.version:
+            return False
+        
+        try:
+            kb = self._read_kb(self.kb_path)
+        except Exception as e:
+            print(f"⚠️ Could not load new knowledge base version {version}: {e}")
+            return False
+        
+        with self._swap_lock:
+            old_version = self.version
+            self.kb = kb
+        print(f"🔁 Knowledge base {self.kb_path} swapped: {old_version} → {kb['version']}")
+        return True
+
+    def start_watcher(self, interval=None):
+        """Poll for newly published KB versions on a background thread"""
+        if interval is None:
+            interval = KB_WATCH_INTERVAL
+        if interval <= 0 or (self._watcher and self._watcher.is_alive()):
+            return
+        
+        self._stop_watching.clear()
+        
+        def watch():
+            while not self._stop_watching.wait(interval):
+                self.check_for_update()
+        
+        self._watcher = threading.Thread(target=watch, name="kb-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        """Stop the background threads (KB watcher and idle unloader)"""
+        self._stop_watching.set()
+        if self._watcher:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+        self.stop_idle_unloader()
+
+    def start_idle_unloader(self, idle_seconds=None):
+        """Release the encoder after idle_seconds without a search"""
+        if idle_seconds is None:
+            idle_seconds = MODEL_IDLE_SECONDS
+        if idle_seconds <= 0 or (self._idle_thread and self._idle_thread.is_alive()):
+            return
+
+        self._stop_idle.clear()
+
+        def watch():
+            while not self._stop_idle.wait(min(idle_seconds, 30)):
+                if time.monotonic() - self.last_used >= idle_seconds:
+                    self.release_memory()
+
+        self._idle_thread = threading.Thread(target=watch, name="idle-unloader", daemon=True)
+        self._idle_thread.start()
+
+    def stop_idle_unloader(self):
+        self._stop_idle.set()
+        if self._idle_thread:
+            self._idle_thread.join(timeout=5)
+            self._idle_thread = None
+
+    def release_memory(self):
+        """Drop the encoder (and a memory-mapped index) until a query needs them again"""
+        with self._resident_lock:
+            kb = self.kb
+            if kb is None or kb['model'] is None:
+                return False
+            before = rss_mb()
+            released = dict(kb, model=None)
+            if INDEX_MMAP:
+                released.update(index=None, vectors=None)
+            with self._swap_lock:
+                if self.kb is not kb:
+                    return False
+                self.kb = released
+            # In-flight searches keep their own reference until they finish
+            del kb
+            release_freed_memory()
+            self.memory_counts['releases'] += 1
+        print(f"💤 Released embedding model{' and index' if INDEX_MMAP else ''} after "
+              f"{time.monotonic() - self.last_used:.0f}s idle: RSS {before:.0f} → {rss_mb():.0f} MB")
+        return True
+
+    def _ensure_resident(self):
+        """The live KB with encoder and index loaded, reloading whatever was released"""
+        kb = self.kb
+        if kb['model'] is not None and kb['index'] is not None:
+            return kb
+
+        with self._resident_lock:
+            kb = self.kb
+            if kb['model'] is not None and kb['index'] is not None:
+                return kb
+            before = rss_mb()
+            start = time.perf_counter()
+            reloaded = dict(kb)
+            if kb['model'] is None:
+                expected_hash = kb['manifest'].get('model_hash') if kb['manifest'] else None
+                reloaded['model'], reloaded['model_hash'] = load_embedding_model(kb['model_name'], expected_hash)
+            if kb['index'] is None:
+                reloaded['index'], reloaded['groups'], reloaded['vectors'] = self._load_index(
+                    kb['path'], kb['data'].get('groups')
+                )
+            with self._swap_lock:
+                # A version swapped in meanwhile is left alone; it reloads on its next query
+                if self.kb is kb:
+                    self.kb = reloaded
+            self.memory_counts['reloads'] += 1
+        print(f"⏰ Reloaded embedding model in {time.perf_counter() - start:.1f}s: "
+              f"RSS {before:.0f} → {rss_mb():.0f} MB")
+        return reloaded
+
+    def memory_stats(self):
+        """Whether the encoder/index are resident, RSS and release/reload counts"""
+        kb = self.kb
+        return {
+            'model_resident': bool(kb and kb['model'] is not None),
+            'index_resident': bool(kb and kb['index'] is not None),
+            'idle_seconds': round(time.monotonic() - self.last_used, 1),
+            'rss_mb': round(rss_mb(), 1),
+            **self.memory_counts
+        }
+
+    def model_free_hit(self, query):
+        """An exact section reference ("section 302") answered from the lookup table"""
+        match = NUMBER_QUERY_PATTERN.match(normalize(query))
+        hit = self.get_section(match.group(1)) if match else None
+        if hit:
+            self.memory_counts['model_free_lookups'] += 1
+        return hit
     
-    def search(self, query, k=3):
+    def search(self, query, k=3, profile=False):
         """Search the knowledge base"""
+        if should_profile(profile, query):
+            with profile_request("search", query):
+                return self.search_query(query, k)
+        return self.search_query(query, k)
+    
+    def search_query(self, query, k=3):
         if not self.loaded:
             if not self.load_knowledge_base():
                 return []
         
         try:
-            import faiss
-            import numpy as np
-            
-            # Encode query
-            query_embedding = self.model.encode([query])
-            
-            # Normalize for cosine similarity
-            faiss.normalize_L2(query_embedding)
-            
-            # Search
-            D, I = self.index.search(query_embedding, k=k)
-            
-            results = []
-            for i, idx in enumerate(I[0]):
-                if idx < len(self.texts):
-                    results.append({
-                        'content': self.texts[idx],
-                        'metadata': self.metadatas[idx],
-                        'score': D[0][i]
-                    })
-            
-            return results
+            if self.kb['model'] is None:
+                # Released while idle: don't wake the encoder for an exact section lookup
+                hit = self.model_free_hit(query)
+                if hit:
+                    return [hit]
+
+            if SEARCH_BATCHING and not is_profiling():
+                # Concurrent callers share one encode + index search
+                return self.get_batcher().search(query, k)
+            return self.search_batch([query], [k])[0]
             
         except Exception as e:
             print(f"❌ Search failed: {e}")
             return []
 
+    def get_section(self, section):
+        """Direct lookup of one IPC section by number (e.g. 302 or '120B')"""
+        if not self.loaded:
+            if not self.load_knowledge_base():
+                return None
+        
+        kb = self.kb
+        idx = kb['section_lookup'].get(str(section).strip().upper())
+        if idx is None:
+            return None
+        return {
+            'content': kb['texts'][idx],
+            'metadata': kb['metadatas'][idx],
+            'score': 1.0
+        }
+
+    def get_cross_references(self, section):
+        """Sections cited in a section's text (graph stored with the KB at build time)"""
+        kb = self.kb
+        if not kb:
+            return []
+        graph = kb['data'].get('cross_references') or {}
+        return graph.get(str(section).strip().upper(), [])
+
+    def get_equivalents(self, section, code='ipc'):
+        """Corresponding BNS sections of an IPC section, or vice versa (table stored with the KB)"""
+        kb = self.kb
+        if not kb:
+            return None
+        return equivalents(kb['data'].get('bns_mapping'), section, code)
+
+    def get_batcher(self):
+        """Lazily start the micro-batching dispatcher"""
+        if self._batcher is None:
+            with self._batcher_lock:
+                if self._batcher is None:
+                    from src.search_batcher import SearchBatcher
+                    self._batcher = SearchBatcher(
+                        self.search_batch,
+                        max_wait_ms=SEARCH_BATCH_MAX_WAIT_MS,
+                        max_batch=SEARCH_BATCH_MAX_SIZE
+                    )
+        return self._batcher
+
+    def batch_stats(self):
+        """Queue depth and batch size metrics of the dispatcher"""
+        return self._batcher.stats() if self._batcher else {}
+
+    def search_batch(self, queries, ks):
+        """Encode and search several queries in one pass"""
+        import faiss
+        import numpy as np
+        
+        # Pin the current version for the whole batch
+        self.last_used = time.monotonic()
+        kb = self._ensure_resident()
+        
+        # Encode queries
+        query_embeddings = np.asarray(kb['model'].encode(list(queries)), dtype='float32')
+        
+        # Normalize for cosine similarity
+        faiss.normalize_L2(query_embeddings)
+        
+        # Per query: list of (score, row) hits
+        hits = [None] * len(ks)
+        if kb['groups'] is not None:
+            for row, k in enumerate(ks):
+                found = coarse_to_fine_search(kb['groups'], kb['vectors'], query_embeddings[row], k)
+                if found is not None:
+                    hits[row] = list(zip(*found))
+        
+        # Remaining queries: one flat search with the largest k, then trim per query
+        flat_rows = [row for row, found in enumerate(hits) if found is None]
+        if flat_rows:
+            D, I = kb['index'].search(query_embeddings[flat_rows], k=max(ks[row] for row in flat_rows))
+            for i, row in enumerate(flat_rows):
+                hits[row] = list(zip(D[i][:ks[row]], I[i][:ks[row]]))
+        self.search_counts['flat'] += len(flat_rows)
+        self.search_counts['hierarchical'] += len(ks) - len(flat_rows)
+        
+        batch_results = []
+        for found in hits:
+            results = []
+            for score, idx in found:
+                if 0 <= idx < len(kb['texts']):
+                    results.append({
+                        'content': kb['texts'][idx],
+                        'metadata': kb['metadatas'][idx],
+                        'score': score
+                    })
+            batch_results.append(results)
+        
+        return batch_results
+
 def test_faiss_search():
     """Test FAISS search functionality"""
     print("🔍 Testing FAISS Search...")
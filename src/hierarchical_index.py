@@ -0,0 +1,68 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import HIERARCHICAL_TOP_GROUPS, HIERARCHICAL_MARGIN
+
+
+def group_key(metadata):
+    """IPC sections group by chapter, PDF chunks by source document"""
+    if metadata.get('chapter') not in (None, ''):
+        return f"chapter:{metadata['chapter']}"
+    return f"source:{metadata.get('source', 'unknown')}"
+
+
+def build_groups(embeddings, metadatas):
+    """Centroid vector and member rows for every group (embeddings must be L2-normalised)"""
+    import numpy as np
+
+    members = {}
+    for row, metadata in enumerate(metadatas):
+        members.setdefault(group_key(metadata), []).append(row)
+
+    keys = sorted(members)
+    centroids = np.zeros((len(keys), embeddings.shape[1]), dtype='float32')
+    for g, key in enumerate(keys):
+        centroid = embeddings[members[key]].mean(axis=0)
+        norm = np.linalg.norm(centroid)
+        centroids[g] = centroid / norm if norm > 0 else centroid
+
+    print(f"🧭 Built {len(keys)} group centroids for coarse-to-fine search")
+    return {
+        'keys': keys,
+        'centroids': centroids,
+        'members': [np.asarray(members[key], dtype='int64') for key in keys]
+    }
+
+
+def coarse_to_fine_search(groups, vectors, query_vector, k, top_groups=None, margin=None):
+    """Search only inside the best-matching groups.
+
+    Returns (scores, rows) sorted by score, or None when the group scores are
+    too close to call and the caller should fall through to a flat search.
+    """
+    import numpy as np
+
+    if top_groups is None:
+        top_groups = HIERARCHICAL_TOP_GROUPS
+    if margin is None:
+        margin = HIERARCHICAL_MARGIN
+
+    centroid_scores = groups['centroids'] @ query_vector
+    if len(centroid_scores) <= top_groups:
+        return None
+
+    order = np.argsort(-centroid_scores)
+    # Last group kept vs first group dropped: a narrow gap means an unsafe cut
+    if centroid_scores[order[top_groups - 1]] - centroid_scores[order[top_groups]] < margin:
+        return None
+
+    rows = np.concatenate([groups['members'][g] for g in order[:top_groups]])
+    if len(rows) < k:
+        return None
+
+    scores = vectors[rows] @ query_vector
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return scores[top], rows[top]
@@ -1,17 +1,32 @@
+import sys
 import json
-import pickle
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
 import faiss
 import numpy as np
 
-def create_ipc_knowledge_base():
-    """Create IPC knowledge base from JSON - CLEAN VERSION"""
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.embedding_pipeline import encode_texts
+from src.model_store import load_embedding_model
+from src.kb_store import publish_kb
+from src.hierarchical_index import build_groups
+from src.cross_references import build_cross_reference_graph
+from src.bns_mapping import build_bns_mapping
+from src.section_lookup import IPC_JSON_PATH, IPC_KB_SOURCES, section_text, section_metadata
+
+def create_ipc_knowledge_base(progress=None, model=None, model_hash=None, kb_dir="knowledge_base/ipc_complete"):
+    """Create IPC knowledge base from JSON - CLEAN VERSION
+    
+    progress(stage, percent) is called as the build advances. Pass an
+    already loaded encoder (and its snapshot hash) to share it across builds.
+    """
     print("📚 Creating IPC Knowledge Base from JSON...")
+    report = progress or (lambda stage, percent: None)
     
     try:
         # Load IPC JSON data
-        json_path = Path("data/ipc/ipc_sections.json")
+        report("Loading IPC sections", 5)
+        json_path = Path(IPC_JSON_PATH)
         if not json_path.exists():
             print("❌ IPC JSON file not found at:", json_path)
             return False
@@ -27,47 +42,41 @@ def create_ipc_knowledge_base():
         
         for section in ipc_data:
             # Create comprehensive text for better search
-            text = (
-                f"IPC Section {section['Section']} | "
-                f"Title: {section['section_title']} | "
-                f"Description: {section['section_desc']} | "
-                f"Chapter {section['chapter']}: {section['chapter_title']}"
-            )
-            all_texts.append(text)
-            
-            all_metadatas.append({
-                "source": "Indian Penal Code",
-                "section": section['Section'],
-                "section_title": section['section_title'],
-                "chapter": section['chapter'],
-                "chapter_title": section['chapter_title'],
-                "type": "ipc_section"
-            })
+            all_texts.append(section_text(section))
+            all_metadatas.append(section_metadata(section))
         
         print(f"📦 Created {len(all_texts)} section entries")
         
         # Create embeddings
-        model = SentenceTransformer('all-MiniLM-L6-v2')
-        embeddings = model.encode(all_texts)
+        report("Encoding sections", 20)
+        if model is None:
+            model, model_hash = load_embedding_model()
+        embeddings = encode_texts(model, all_texts)
+        
+        # IPC <-> BNS table, reusing the section embeddings; optional
+        report("Matching BNS sections", 70)
+        try:
+            bns_mapping = build_bns_mapping(ipc_data, model, ipc_embeddings=embeddings)
+        except Exception as e:
+            print(f"⚠️ Skipping IPC↔BNS table: {e}")
+            bns_mapping = None
         
         # Create FAISS index
+        report("Building index", 80)
         dimension = embeddings.shape[1]
         index = faiss.IndexFlatIP(dimension)
         faiss.normalize_L2(embeddings)
         index.add(embeddings)
         
         # Save knowledge base
-        kb_dir = Path("knowledge_base/ipc_complete")
-        kb_dir.mkdir(parents=True, exist_ok=True)
-        
-        faiss.write_index(index, str(kb_dir / "index.faiss"))
-        with open(kb_dir / "metadata.pkl", 'wb') as f:
-            pickle.dump({
-                'texts': all_texts,
-                'metadatas': all_metadatas,
-                'dimension': dimension,
-                'section_count': len(all_texts)
-            }, f)
+        report("Publishing", 90)
+        kb_dir = Path(kb_dir)
+        publish_kb(kb_dir, index, all_texts, all_metadatas, sources=IPC_KB_SOURCES, model_hash=model_hash, extra={
+            'section_count': len(all_texts),
+            'groups': build_groups(embeddings, all_metadatas),
+            'cross_references': build_cross_reference_graph(ipc_data),
+            'bns_mapping': bns_mapping
+        })
         
         print(f"✅ IPC Knowledge Base saved successfully!")
         print(f"📍 Location: {kb_dir}")
@@ -85,6 +94,7 @@ def create_ipc_knowledge_base():
         else:
             print("   Test query returned no results")
         
+        report("Ready", 100)
         return True
         
     except Exception as e:
@@ -0,0 +1,76 @@
+import sys
+import time
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+class KBBootstrapper:
+    """Builds a missing or stale knowledge base on a background thread"""
+
+    def __init__(self, kb_path, builder, on_ready=None):
+        # builder(progress=callback) -> bool, e.g. create_ipc_knowledge_base
+        self.kb_path = kb_path
+        self.builder = builder
+        self.on_ready = on_ready
+        self.state = 'idle'
+        self.stage = None
+        self.percent = 0
+        self.error = None
+        self.started = None
+        self.finished = None
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self.state = 'building'
+        self.started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="kb-bootstrap", daemon=True)
+        self._thread.start()
+
+    def _progress(self, stage, percent):
+        self.stage = stage
+        self.percent = percent
+        print(f"🏗️ Bootstrap {self.kb_path}: {stage} ({percent}%)")
+
+    def _run(self):
+        print(f"🏗️ Building {self.kb_path} in the background...")
+        try:
+            ok = self.builder(progress=self._progress)
+        except Exception as e:
+            ok = False
+            self.error = str(e)
+        self.finished = time.monotonic()
+
+        if not ok:
+            self.state = 'failed'
+            print(f"❌ Background build of {self.kb_path} failed{': ' + self.error if self.error else ''}")
+            return
+
+        self.state = 'ready'
+        print(f"✅ Background build of {self.kb_path} finished in {self.finished - self.started:.1f}s")
+        if self.on_ready:
+            try:
+                self.on_ready(self.kb_path)
+            except Exception as e:
+                print(f"❌ Could not switch to the new knowledge base: {e}")
+
+    def is_building(self):
+        return self.state == 'building'
+
+    def wait(self, timeout=None):
+        if self._thread:
+            self._thread.join(timeout)
+
+    def status(self):
+        end = self.finished or time.monotonic()
+        return {
+            'kb_path': str(self.kb_path),
+            'state': self.state,
+            'stage': self.stage,
+            'percent': self.percent,
+            'error': self.error,
+            'elapsed_s': round(end - self.started, 1) if self.started else 0.0
+        }
@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import time
+import shutil
+import pickle
+import hashlib
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import EMBEDDING_MODEL, KB_KEEP_VERSIONS, KB_VERIFY_CHECKSUMS, SUPPORTED_EXTENSIONS
+
+# Layout of a versioned knowledge base:
+#   <kb_path>/CURRENT                 -> name of the published version
+#   <kb_path>/versions/<version>/     -> index.faiss, metadata.pkl, manifest.json
+# Directories without CURRENT are treated as the legacy flat layout.
+POINTER_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+MANIFEST_FILE = "manifest.json"
+KB_FILES = ("index.faiss", "metadata.pkl")
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_pointer(kb_path):
+    """Return the published version name, or None for a legacy/missing KB"""
+    try:
+        return (Path(kb_path) / POINTER_FILE).read_text(encoding='utf-8').strip() or None
+    except OSError:
+        return None
+
+
+def resolve_kb_dir(kb_path):
+    """Directory holding the files of the currently published version"""
+    version = read_pointer(kb_path)
+    if version is None:
+        return Path(kb_path), None
+    return Path(kb_path) / VERSIONS_DIR / version, version
+
+
+def read_manifest(version_dir):
+    try:
+        with open(Path(version_dir) / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def verify_version(version_dir, manifest, check_hashes=None):
+    """Check that every file listed in the manifest is present and intact"""
+    if check_hashes is None:
+        check_hashes = KB_VERIFY_CHECKSUMS
+    for name, info in manifest.get('files', {}).items():
+        path = Path(version_dir) / name
+        if not path.exists() or path.stat().st_size != info['bytes']:
+            return False, f"{name} is missing or has the wrong size"
+        if check_hashes and file_sha256(path) != info['sha256']:
+            return False, f"{name} checksum mismatch"
+    return True, "ok"
+
+
+def source_fingerprints(paths):
+    """Content hashes of the input files a KB was built from"""
+    return {str(path): file_sha256(path) for path in sorted(map(str, paths))}
+
+
+def data_sources(data_dir="data", extensions=None):
+    """Document files under data_dir that the PDF/text builders read"""
+    if extensions is None:
+        extensions = SUPPORTED_EXTENSIONS
+    return sorted(
+        str(path) for path in Path(data_dir).rglob("*")
+        if path.is_file() and path.suffix.lower() in extensions
+    )
+
+
+def kb_status(kb_path, sources):
+    """'missing', 'stale' (inputs changed or no manifest) or 'ok'"""
+    kb_dir, version = resolve_kb_dir(kb_path)
+    if not (kb_dir / "index.faiss").exists() or not (kb_dir / "metadata.pkl").exists():
+        return 'missing'
+    manifest = read_manifest(kb_dir) if version else None
+    if not manifest or 'sources' not in manifest:
+        return 'stale'
+    try:
+        current = source_fingerprints(sources)
+    except OSError:
+        return 'stale'
+    return 'ok' if current == manifest['sources'] else 'stale'
+
+
+def publish_kb(kb_path, index, texts, metadatas, extra=None, model_name=None, sources=None, model_hash=None):
+    """Write a new KB version and atomically make it the current one"""
+    import faiss
+
+    kb_path = Path(kb_path)
+    versions_dir = kb_path / VERSIONS_DIR
+    versions_dir.mkdir(parents=True, exist_ok=True)
+
+    staging_dir = versions_dir / f".build-{os.getpid()}-{time.time_ns()}.partial"
+    staging_dir.mkdir()
+
+    payload = {
+        'texts': texts,
+        'metadatas': metadatas,
+        'dimension': index.d
+    }
+    if extra:
+        payload.update(extra)
+
+    faiss.write_index(index, str(staging_dir / "index.faiss"))
+    with open(staging_dir / "metadata.pkl", 'wb') as f:
+        pickle.dump(payload, f)
+
+    # Timestamped names sort chronologically; suffix rebuilds within one second
+    base_version = time.strftime("%Y%m%dT%H%M%S")
+    version = base_version
+    suffix = 1
+    while (versions_dir / version).exists():
+        version = f"{base_version}.{suffix}"
+        suffix += 1
+
+    manifest = {
+        'version': version,
+        'created_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'model': model_name or EMBEDDING_MODEL,
+        # Hash of the local model snapshot the vectors were encoded with
+        'model_hash': model_hash,
+        'dimension': index.d,
+        'vector_count': index.ntotal,
+        'text_count': len(texts),
+        'sources': source_fingerprints(sources or []),
+        'files': {
+            name: {
+                'bytes': (staging_dir / name).stat().st_size,
+                'sha256': file_sha256(staging_dir / name)
+            }
+            for name in KB_FILES
+        }
+    }
+    with open(staging_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Readers only ever see complete version directories
+    version_dir = versions_dir / version
+    os.replace(staging_dir, version_dir)
+
+    pointer_tmp = kb_path / (POINTER_FILE + ".tmp")
+    pointer_tmp.write_text(version, encoding='utf-8')
+    os.replace(pointer_tmp, kb_path / POINTER_FILE)
+
+    prune_versions(kb_path)
+    print(f"📌 Published {kb_path} version {version}")
+    return version_dir, manifest
+
+
+def prune_versions(kb_path, keep=None):
+    """Delete old versions, always keeping the current one"""
+    if keep is None:
+        keep = KB_KEEP_VERSIONS
+    versions_dir = Path(kb_path) / VERSIONS_DIR
+    current = read_pointer(kb_path)
+    versions = sorted(
+        (p for p in versions_dir.iterdir() if p.is_dir() and not p.name.startswith('.')),
+        key=lambda p: p.name,
+        reverse=True
+    )
+    for old in versions[keep:]:
+        if old.name != current:
+            shutil.rmtree(old, ignore_errors=True)
@@ -0,0 +1,310 @@
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from types import SimpleNamespace
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src import rate_limiter
+from src.rate_limiter import ERROR_ANSWER_PREFIXES
+from src.memory_budget import rss_mb
+from src.query_log import percentile
+
+# Same prompts as the Quick Access buttons in app.py
+BUTTON_QUERIES = [
+    "What is IPC Section 302 punishment for murder?",
+    "Explain IPC Section 375 definition of rape",
+    "Explain Section 511 about attempts to commit offences",
+    "What is IPC Section 420 punishment for cheating?",
+    "punishment for murder",
+    "rape laws punishment",
+    "theft definition and punishment",
+    "cheating section 420",
+]
+FREE_TEXT_QUERIES = [
+    "someone broke into my house at night and stole jewellery",
+    "what happens if a public servant takes a bribe",
+    "is it a crime to threaten someone over the phone",
+    "my neighbour hit me with a stick and I was injured",
+    "punishment for causing death by negligence in a car accident",
+    "can a person be punished for helping someone commit suicide",
+    "what is the offence of defamation",
+    "forging a signature on a cheque",
+]
+SECTION_QUERIES = ["Section 304B", "IPC 379", "section 498A", "What is Section 124A?", "sec 354", "IPC 120B"]
+FOLLOW_UP_QUERIES = ["what is its punishment?", "and is it bailable?"]
+
+QUERY_MIX = {
+    'button': (BUTTON_QUERIES, 0.4),
+    'free_text': (FREE_TEXT_QUERIES, 0.3),
+    'section': (SECTION_QUERIES, 0.2),
+    'follow_up': (FOLLOW_UP_QUERIES, 0.1),
+}
+CITED_SECTION_PATTERN = re.compile(r"IPC Section (\d+[A-Z]{0,3})")
+
+
+def summarize(values):
+    """Latency summary in ms of a list of durations in seconds"""
+    return {
+        'count': len(values),
+        'p50_ms': round(percentile(values, 50) * 1000, 1),
+        'p90_ms': round(percentile(values, 90) * 1000, 1),
+        'p99_ms': round(percentile(values, 99) * 1000, 1),
+        'max_ms': round(max(values) * 1000, 1) if values else 0.0
+    }
+
+
+class FakeLLMClient:
+    """Stands in for groq.Client with a configurable latency and failure rate"""
+
+    def __init__(self, latency=1.0, jitter=0.3, error_rate=0.0, tokens=60):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.tokens = tokens
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model=None, messages=None, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+        delay = max(0.0, random.gauss(self.latency, self.jitter))
+        if random.random() < self.error_rate:
+            time.sleep(delay / 2)
+            raise RuntimeError("fake LLM failure")
+
+        prompt = messages[-1]['content'] if messages else ""
+        cited = CITED_SECTION_PATTERN.findall(prompt)
+        words = (f"According to IPC Section {cited[0] if cited else 'N/A'}, " + "the provision applies. " * self.tokens).split()
+        words = words[:self.tokens]
+
+        if not stream:
+            time.sleep(delay)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=" ".join(words)))])
+
+        def chunks():
+            for word in words:
+                time.sleep(delay / len(words))
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word + " "))])
+        return chunks()
+
+
+class StageRecorder:
+    """Collects per-stage durations from every thread"""
+
+    def __init__(self):
+        self.durations = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.durations.setdefault(stage, []).append(seconds)
+
+    def wrap(self, stage, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+        return timed
+
+    def wrap_stream(self, stage, fn):
+        """Like wrap, but a streamed response is timed until its last chunk"""
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = fn(*args, **kwargs)
+            if not kwargs.get('stream'):
+                self.record(stage, time.perf_counter() - start)
+                return result
+
+            def chunks():
+                try:
+                    yield from result
+                finally:
+                    self.record(stage, time.perf_counter() - start)
+            return chunks()
+        return timed
+
+    def report(self):
+        with self._lock:
+            return {stage: summarize(values) for stage, values in self.durations.items()}
+
+
+class MemorySampler:
+    """Samples RSS in the background to catch the peak during the run"""
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.start_mb = rss_mb()
+        self.peak_mb = self.start_mb
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, rss_mb())
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        end_mb = rss_mb()
+        self.peak_mb = max(self.peak_mb, end_mb)
+        return {
+            'start_mb': round(self.start_mb, 1),
+            'end_mb': round(end_mb, 1),
+            'peak_mb': round(self.peak_mb, 1),
+            'growth_mb': round(end_mb - self.start_mb, 1)
+        }
+
+
+def pick_query(rng):
+    kinds = list(QUERY_MIX)
+    kind = rng.choices(kinds, weights=[QUERY_MIX[k][1] for k in kinds])[0]
+    return kind, rng.choice(QUERY_MIX[kind][0])
+
+
+def instrument(rag, recorder):
+    """Time the pipeline stages of one CompleteIPCRAG instance"""
+    rag.retrieve = recorder.wrap('retrieval', rag.retrieve)
+    rag.build_ipc_context = recorder.wrap('context', rag.build_ipc_context)
+    rag.generate_ipc_answer = recorder.wrap('generation', rag.generate_ipc_answer)
+    rag.client.chat.completions.create = recorder.wrap_stream('llm', rag.client.chat.completions.create)
+
+
+def run_load_test(users=10, requests_per_user=20, latency=1.0, jitter=0.3, error_rate=0.0,
+                  think_time=0.5, deadline=None, rate_limit=False, seed=0, rag=None):
+    """Replay the query mix from many concurrent sessions against one shared pipeline"""
+    if not rate_limit:
+        # The fake LLM has no quota; measure the pipeline, not the limiter
+        rate_limiter._limiter = rate_limiter.LLMRateLimiter(
+            requests_per_minute=10 ** 9, tokens_per_minute=10 ** 12, queue_max=10 ** 6
+        )
+
+    if rag is None:
+        from src.complete_ipc_rag import CompleteIPCRAG
+        rag = CompleteIPCRAG()
+    if not rag.searcher:
+        print("❌ No knowledge base loaded; build one before load testing")
+        return None
+
+    # Warm up first so the memory baseline already includes the model and index
+    rag.client = FakeLLMClient(0.0, 0.0)
+    rag.ask_with_deadline(BUTTON_QUERIES[0], {}, deadline=0, log=False)
+    memory = MemorySampler()
+
+    rag.client = FakeLLMClient(latency, jitter, error_rate)
+    recorder = StageRecorder()
+    instrument(rag, recorder)
+
+    outcomes = {'ok': 0, 'fallback': 0, 'no_context': 0, 'busy': 0, 'error': 0}
+    by_kind = {kind: [] for kind in QUERY_MIX}
+    lock = threading.Lock()
+
+    def session(user):
+        rng = random.Random(seed * 100003 + user)
+        conversation = {}
+        for _ in range(requests_per_user):
+            time.sleep(rng.uniform(0, think_time * 2))
+            kind, query = pick_query(rng)
+            start = time.perf_counter()
+            try:
+                answer, pending = rag.ask_with_deadline(query, conversation, deadline, log=False)
+                if pending is not None:
+                    outcome = 'fallback'
+                elif answer.startswith(rate_limiter.LLM_BUSY_MESSAGE):
+                    outcome = 'busy'
+                elif answer.startswith(ERROR_ANSWER_PREFIXES):
+                    outcome = 'error'
+                elif answer.startswith("I couldn't find"):
+                    outcome = 'no_context'
+                else:
+                    outcome = 'ok'
+            except Exception as e:
+                print(f"❌ {query!r}: {e}")
+                outcome = 'error'
+            elapsed = time.perf_counter() - start
+            recorder.record('total', elapsed)
+            with lock:
+                outcomes[outcome] += 1
+                by_kind[kind].append(elapsed)
+
+    print(f"🚦 {users} concurrent sessions x {requests_per_user} questions, "
+          f"fake LLM {latency}s ± {jitter}s, error rate {error_rate:.0%}")
+    memory.start()
+    run_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users, thread_name_prefix="user") as executor:
+        list(executor.map(session, range(users)))
+    wall = time.perf_counter() - run_start
+
+    total = sum(outcomes.values())
+    report = {
+        'users': users,
+        'requests': total,
+        'wall_s': round(wall, 2),
+        'throughput_qps': round(total / wall, 2) if wall else 0.0,
+        'outcomes': outcomes,
+        'error_rate': round((outcomes['error'] + outcomes['busy']) / total, 4) if total else 0.0,
+        'stages': recorder.report(),
+        'by_query_kind': {kind: summarize(values) for kind, values in by_kind.items() if values},
+        'llm_calls': rag.client.calls,
+        'coalescing': rag.coalescing_stats(),
+        'memory': memory.stop()
+    }
+    if hasattr(rag.searcher, 'batch_stats'):
+        report['search_batching'] = rag.searcher.batch_stats()
+    return report
+
+
+def print_report(report):
+    print(f"\n📊 {report['requests']} questions in {report['wall_s']}s "
+          f"→ {report['throughput_qps']} questions/s")
+    print("Outcomes: " + ", ".join(f"{k}={v}" for k, v in report['outcomes'].items())
+          + f" (error rate {report['error_rate']:.1%})")
+    print(f"\n{'stage':<18}{'count':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, rows in (('', report['stages']), ('query: ', report['by_query_kind'])):
+        for stage, s in rows.items():
+            print(f"{name + stage:<18}{s['count']:>7}{s['p50_ms']:>10}{s['p90_ms']:>10}{s['p99_ms']:>10}{s['max_ms']:>10}")
+    print(f"\nLLM calls: {report['llm_calls']}, coalescing: {report['coalescing']}")
+    memory = report['memory']
+    print(f"Memory: {memory['start_mb']} MB → {memory['end_mb']} MB "
+          f"(peak {memory['peak_mb']} MB, growth {memory['growth_mb']:+} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test CompleteIPCRAG with concurrent sessions and a fake LLM")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent sessions")
+    parser.add_argument("--requests", type=int, default=20, help="Questions per session")
+    parser.add_argument("--latency", type=float, default=1.0, help="Mean fake LLM latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Std deviation of the fake LLM latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake LLM calls that fail")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Mean pause between a session's questions")
+    parser.add_argument("--deadline", type=float, default=None, help="Answer deadline (default: LLM_DEADLINE_SECONDS)")
+    parser.add_argument("--rate-limit", action="store_true", help="Keep the configured LLM rate limits")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = run_load_test(args.users, args.requests, args.latency, args.jitter, args.error_rate,
+                           args.think_time, args.deadline, args.rate_limit, args.seed)
+    if report is None:
+        sys.exit(1)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
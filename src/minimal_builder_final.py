@@ -1,17 +1,58 @@
-import os
 import sys
+import json
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent))
 
+def chroma_metadata(metadata):
+    """Chroma only stores str/int/float/bool values: JSON-encode the rest (e.g. dedup 'duplicates')"""
+    return {
+        key: value if isinstance(value, (str, int, float, bool)) else json.dumps(value, ensure_ascii=False)
+        for key, value in metadata.items()
+        if value is not None
+    }
+
+def store_in_chroma(texts, metadatas, embeddings, path="knowledge_base/chroma_db", batch_size=50):
+    """Replace the legal_docs collection with precomputed chunk embeddings"""
+    import chromadb
+    
+    print("🗄️ Creating vector database...")
+    client = chromadb.PersistentClient(path=path)
+    
+    # Delete existing collection if it exists
+    try:
+        client.delete_collection("legal_docs")
+        print("♻️  Deleted existing collection")
+    except:
+        pass
+        
+    collection = client.get_or_create_collection(
+        name="legal_docs",
+        metadata={"description": "Indian Legal Documents and Policies"}
+    )
+    
+    # Add to the collection in smaller batches to avoid memory issues
+    ids = [f"chunk_{i}" for i in range(len(texts))]
+    total_batches = (len(texts) + batch_size - 1) // batch_size
+    for i in range(0, len(texts), batch_size):
+        print(f"🔄 Storing batch {i//batch_size + 1}/{total_batches}...")
+        collection.add(
+            embeddings=embeddings[i:i + batch_size].tolist(),
+            documents=texts[i:i + batch_size],
+            metadatas=[chroma_metadata(m) for m in metadatas[i:i + batch_size]],
+            ids=ids[i:i + batch_size]
+        )
+    return collection
+
 def build_minimal_kb():
     """Minimal knowledge base builder that definitely works"""
     print("🚀 Starting Minimal Knowledge Base Construction...")
     
     try:
         from utils.file_handlers import load_documents
-        from sentence_transformers import SentenceTransformer
-        import chromadb
+        from src.embedding_pipeline import encode_texts
+        from src.chunker import chunk_documents
+        from src.model_store import load_embedding_model
     except ImportError as e:
         print(f"❌ Missing dependency: {e}")
         return None
@@ -29,80 +70,23 @@ def build_minimal_kb():
     # Step 2: Initialize embeddings model
     print("🔤 Loading embeddings model...")
     try:
-        # Use the model we already downloaded
-        model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Use the local snapshot when there is one
+        model, _ = load_embedding_model()
         print("✅ Embedding model loaded!")
     except Exception as e:
         print(f"❌ Failed to load model: {e}")
         return
     
-    # Step 3: Create ChromaDB client
-    print("🗄️ Creating vector database...")
+    # Step 3: Chunk, embed and store in ChromaDB
     try:
-        client = chromadb.PersistentClient(path="knowledge_base/chroma_db")
-        
-        # Delete existing collection if it exists
-        try:
-            client.delete_collection("legal_docs")
-            print("♻️  Deleted existing collection")
-        except:
-            pass
-            
-        collection = client.get_or_create_collection(
-            name="legal_docs",
-            metadata={"description": "Indian Legal Documents and Policies"}
-        )
-        
-        # Process documents and create chunks
+        # Token-bounded chunks with CHUNK_SIZE / CHUNK_OVERLAP from config
         print("✂️ Processing documents into chunks...")
-        all_texts = []
-        all_metadatas = []
-        all_ids = []
-        
-        chunk_id = 0
-        for doc_idx, doc in enumerate(raw_documents):
-            # Simple chunking - split by paragraphs and sentences
-            content = doc['content']
-            
-            # Split into paragraphs
-            paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
-            
-            for para_idx, paragraph in enumerate(paragraphs):
-                if len(paragraph) > 100:  # Only include substantial paragraphs
-                    all_texts.append(paragraph)
-                    all_metadatas.append({
-                        "source": os.path.basename(doc['source']),
-                        "doc_index": doc_idx,
-                        "chunk_index": para_idx,
-                        "type": doc['type'],
-                        "full_source": doc['source']
-                    })
-                    all_ids.append(f"chunk_{chunk_id}")
-                    chunk_id += 1
-        
+        all_texts, all_metadatas = chunk_documents(raw_documents)
         print(f"📦 Created {len(all_texts)} chunks from documents")
         
-        # Process in smaller batches to avoid memory issues
-        batch_size = 50
-        total_batches = (len(all_texts) + batch_size - 1) // batch_size
-        
-        for i in range(0, len(all_texts), batch_size):
-            batch_texts = all_texts[i:i + batch_size]
-            batch_metadatas = all_metadatas[i:i + batch_size]
-            batch_ids = all_ids[i:i + batch_size]
-            
-            print(f"🔄 Processing batch {i//batch_size + 1}/{total_batches}...")
-            
-            # Generate embeddings for this batch
-            embeddings = model.encode(batch_texts).tolist()
-            
-            # Add to collection
-            collection.add(
-                embeddings=embeddings,
-                documents=batch_texts,
-                metadatas=batch_metadatas,
-                ids=batch_ids
-            )
+        # Generate all embeddings up front across the worker pool
+        all_embeddings = encode_texts(model, all_texts)
+        collection = store_in_chroma(all_texts, all_metadatas, all_embeddings)
         
         print(f"✅ Knowledge base built successfully!")
         print(f"📍 Location: knowledge_base/chroma_db")
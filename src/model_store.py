@@ -0,0 +1,206 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import EMBEDDING_MODEL, MODEL_SNAPSHOT_DIR, MODEL_OFFLINE, MODEL_VERIFY_SNAPSHOT
+from src.kb_store import file_sha256
+
+# Layout of the model store:
+#   <root>/<model>/CURRENT            -> name of the default snapshot
+#   <root>/<model>/<hash[:12]>/       -> model + tokenizer files, snapshot.json
+SNAPSHOT_FILE = "snapshot.json"
+POINTER_FILE = "CURRENT"
+HASH_PREFIX = 12
+
+
+class ModelSnapshotError(Exception):
+    """Raised when the required model snapshot is missing or does not match"""
+
+
+def short_model_name(name):
+    """'sentence-transformers/all-MiniLM-L6-v2' and 'all-MiniLM-L6-v2' are the same model"""
+    return name.split('/')[-1] if name else short_model_name(EMBEDDING_MODEL)
+
+
+def directory_hash(directory):
+    """Hash of every file's relative path and contents, except snapshot.json"""
+    directory = Path(directory)
+    digest = hashlib.sha256()
+    for path in sorted(p for p in directory.rglob('*') if p.is_file() and p.name != SNAPSHOT_FILE):
+        digest.update(path.relative_to(directory).as_posix().encode('utf-8'))
+        digest.update(file_sha256(path).encode('ascii'))
+    return digest.hexdigest()
+
+
+def model_dir(model_name=None, root=None):
+    return Path(root or MODEL_SNAPSHOT_DIR) / short_model_name(model_name)
+
+
+def read_snapshot(snapshot_dir):
+    try:
+        with open(Path(snapshot_dir) / SNAPSHOT_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def find_snapshot(model_name=None, expected_hash=None, root=None):
+    """Directory of the snapshot to load: the one with expected_hash, else the current one"""
+    base = model_dir(model_name, root)
+    if expected_hash:
+        candidate = base / expected_hash[:HASH_PREFIX]
+        return candidate if candidate.exists() else None
+    try:
+        name = (base / POINTER_FILE).read_text(encoding='utf-8').strip()
+    except OSError:
+        return None
+    return base / name if name and (base / name).exists() else None
+
+
+def snapshot_model(model_name=None, root=None):
+    """Download the model once and save it (with its tokenizer) as a hashed local snapshot"""
+    from sentence_transformers import SentenceTransformer
+
+    model_name = model_name or EMBEDDING_MODEL
+    base = model_dir(model_name, root)
+    base.mkdir(parents=True, exist_ok=True)
+
+    print(f"📥 Snapshotting {model_name}...")
+    model = SentenceTransformer(model_name)
+    staging = base / f".snapshot-{os.getpid()}-{time.time_ns()}.partial"
+    model.save(str(staging))
+
+    model_hash = directory_hash(staging)
+    target = base / model_hash[:HASH_PREFIX]
+    with open(staging / SNAPSHOT_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'model': model_name,
+            'hash': model_hash,
+            'dimension': model.get_sentence_embedding_dimension(),
+            'created_at': time.strftime("%Y-%m-%dT%H:%M:%S")
+        }, f, indent=2)
+
+    if target.exists():
+        # Same files as an existing snapshot
+        shutil.rmtree(staging)
+        print(f"♻️ Snapshot {target.name} already exists")
+    else:
+        os.replace(staging, target)
+
+    pointer_tmp = base / (POINTER_FILE + ".tmp")
+    pointer_tmp.write_text(target.name, encoding='utf-8')
+    os.replace(pointer_tmp, base / POINTER_FILE)
+    print(f"✅ Model snapshot {target} (sha256 {model_hash[:HASH_PREFIX]})")
+    return target, model_hash
+
+
+def verify_snapshot(snapshot_dir, expected_hash=None, check_files=None):
+    """Return the snapshot hash, raising ModelSnapshotError if it does not match"""
+    if check_files is None:
+        check_files = MODEL_VERIFY_SNAPSHOT
+    info = read_snapshot(snapshot_dir)
+    if not info:
+        raise ModelSnapshotError(f"{snapshot_dir} has no {SNAPSHOT_FILE}")
+    if expected_hash and info['hash'] != expected_hash:
+        raise ModelSnapshotError(
+            f"snapshot {snapshot_dir} has hash {info['hash'][:HASH_PREFIX]}, "
+            f"knowledge base expects {expected_hash[:HASH_PREFIX]}"
+        )
+    if check_files and directory_hash(snapshot_dir) != info['hash']:
+        raise ModelSnapshotError(f"files in {snapshot_dir} do not match the recorded hash")
+    return info['hash']
+
+
+def disable_hub_access():
+    """Keep huggingface_hub/transformers from contacting the hub in this process"""
+    os.environ['HF_HUB_OFFLINE'] = '1'
+    os.environ['TRANSFORMERS_OFFLINE'] = '1'
+
+
+def load_embedding_model(model_name=None, expected_hash=None, root=None):
+    """Load the encoder from its local snapshot; returns (model, snapshot hash).
+
+    expected_hash comes from the KB manifest: a KB built with another snapshot
+    is refused. Without a snapshot the hub is used (hash None) unless
+    MODEL_OFFLINE is set.
+    """
+    model_name = model_name or EMBEDDING_MODEL
+    snapshot_dir = find_snapshot(model_name, expected_hash, root)
+
+    if snapshot_dir is None:
+        if expected_hash:
+            raise ModelSnapshotError(
+                f"no snapshot {expected_hash[:HASH_PREFIX]} of {model_name} in {model_dir(model_name, root)}; "
+                f"run: python src/model_store.py snapshot"
+            )
+        if MODEL_OFFLINE:
+            raise ModelSnapshotError(f"no local snapshot of {model_name} and MODEL_OFFLINE is set")
+        print(f"⚠️ No local snapshot of {model_name}; loading from the Hugging Face hub")
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(short_model_name(model_name)), None
+
+    model_hash = verify_snapshot(snapshot_dir, expected_hash)
+    disable_hub_access()
+    from sentence_transformers import SentenceTransformer
+    # A local directory path is loaded as-is, without resolving through the hub
+    model = SentenceTransformer(str(snapshot_dir))
+    print(f"✅ Embedding model loaded from snapshot {snapshot_dir}")
+    return model, model_hash
+
+
+def list_snapshots(root=None):
+    root = Path(root or MODEL_SNAPSHOT_DIR)
+    if not root.exists():
+        return []
+    snapshots = []
+    for base in sorted(p for p in root.iterdir() if p.is_dir()):
+        try:
+            current = (base / POINTER_FILE).read_text(encoding='utf-8').strip()
+        except OSError:
+            current = None
+        for snapshot_dir in sorted(p for p in base.iterdir() if p.is_dir() and not p.name.startswith('.')):
+            info = read_snapshot(snapshot_dir) or {}
+            snapshots.append({
+                'path': str(snapshot_dir),
+                'model': info.get('model'),
+                'hash': info.get('hash'),
+                'current': snapshot_dir.name == current
+            })
+    return snapshots
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage local embedding model snapshots")
+    parser.add_argument("command", choices=["snapshot", "verify", "list"])
+    parser.add_argument("--model", default=None, help=f"Model name (default: {EMBEDDING_MODEL})")
+    parser.add_argument("--root", default=None, help=f"Snapshot directory (default: {MODEL_SNAPSHOT_DIR})")
+    args = parser.parse_args()
+
+    if args.command == "snapshot":
+        snapshot_model(args.model, args.root)
+    elif args.command == "verify":
+        snapshot_dir = find_snapshot(args.model, root=args.root)
+        if snapshot_dir is None:
+            print("❌ No snapshot found")
+            sys.exit(1)
+        try:
+            model_hash = verify_snapshot(snapshot_dir, check_files=True)
+        except ModelSnapshotError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"✅ {snapshot_dir} verified (sha256 {model_hash[:HASH_PREFIX]})")
+    else:
+        for snapshot in list_snapshots(args.root):
+            marker = "*" if snapshot['current'] else " "
+            print(f"{marker} {snapshot['path']}  {snapshot['model']}  {(snapshot['hash'] or '')[:HASH_PREFIX]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import io
+import re
+import sys
+import time
+import json
+import random
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from pathlib import Path
+from contextlib import contextmanager
+from datetime import datetime
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import (
+    PROFILE_SAMPLE_RATE,
+    PROFILE_QUERY_MATCH,
+    PROFILE_DIR,
+    PROFILE_KEEP,
+    PROFILE_TRACE_FRAMES
+)
+
+QUERY_MATCH = re.compile(PROFILE_QUERY_MATCH, re.IGNORECASE) if PROFILE_QUERY_MATCH else None
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 20
+CAPTURE_SUFFIXES = ('.prof', '.tracemalloc', '.txt', '.json')
+
+# cProfile and tracemalloc are process-wide; one capture at a time
+_capture_lock = threading.Lock()
+# Set on the thread being profiled; cProfile only sees that thread
+_profiled = threading.local()
+
+
+def should_profile(force=False, text=None):
+    """Whether to profile this request; a cheap check when profiling is off"""
+    if force:
+        return True
+    if QUERY_MATCH is not None and text and QUERY_MATCH.search(text):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def is_profiling():
+    """True inside an active capture: work normally handed to a worker thread
+    (search batcher, LLM executor) should then run inline to be profiled"""
+    return getattr(_profiled, 'active', False)
+
+
+def capture_stem(name, text):
+    slug = re.sub(r"[^a-z0-9]+", "-", (text or "").lower()).strip("-")[:40]
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S.%f")
+    return f"{stamp}-{name}" + (f"-{slug}" if slug else "")
+
+
+@contextmanager
+def profile_request(name, text=None, profile_dir=None):
+    """Profile the enclosed block into PROFILE_DIR.
+
+    Writes <stem>.prof (cProfile; open with snakeviz, flameprof or
+    python -m pstats), <stem>.tracemalloc (tracemalloc.Snapshot.load) and a
+    <stem>.txt summary. Yields a dict whose 'path' is set to the .prof file
+    once it is written, or None if another capture is in progress and the
+    block runs unprofiled.
+    """
+    if not _capture_lock.acquire(blocking=False):
+        yield None
+        return
+
+    try:
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(PROFILE_TRACE_FRAMES)
+        before = tracemalloc.take_snapshot()
+        profiler = cProfile.Profile()
+        capture = {'profiler': profiler, 'path': None}
+        start = time.perf_counter()
+        _profiled.active = True
+        profiler.enable()
+        try:
+            yield capture
+        finally:
+            profiler.disable()
+            _profiled.active = False
+            elapsed = time.perf_counter() - start
+            after = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            if started_tracing:
+                tracemalloc.stop()
+            try:
+                stem = write_capture(name, text, profiler, before, after, elapsed, peak, profile_dir)
+                capture['path'] = str(stem) + '.prof'
+            except OSError as e:
+                print(f"⚠️ Could not write profile: {e}")
+    finally:
+        _capture_lock.release()
+
+
+def write_capture(name, text, profiler, before, after, elapsed, peak, profile_dir=None):
+    directory = Path(profile_dir or PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = directory / capture_stem(name, text)
+
+    profiler.dump_stats(str(stem) + '.prof')
+    after.dump(str(stem) + '.tracemalloc')
+
+    stats_text = io.StringIO()
+    pstats.Stats(profiler, stream=stats_text).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+    growth = after.compare_to(before, 'lineno')[:TOP_ALLOCATIONS]
+
+    with open(str(stem) + '.txt', 'w', encoding='utf-8') as f:
+        f.write(f"{name}: {text!r}\n")
+        f.write(f"elapsed: {elapsed * 1000:.1f} ms, traced peak: {peak / 1024:.1f} KiB\n\n")
+        f.write(f"Top {TOP_ALLOCATIONS} allocation changes during the request:\n")
+        for stat in growth:
+            f.write(f"  {stat}\n")
+        f.write("\n")
+        f.write(stats_text.getvalue())
+
+    with open(str(stem) + '.json', 'w', encoding='utf-8') as f:
+        json.dump({
+            'name': name,
+            'text': text,
+            'elapsed_ms': round(elapsed * 1000, 1),
+            'traced_peak_kib': round(peak / 1024, 1),
+            'created': datetime.now().isoformat(timespec='seconds')
+        }, f, indent=2)
+
+    print(f"🔬 Profiled {name} in {elapsed * 1000:.0f} ms → {stem}.prof")
+    prune_captures(directory)
+    return stem
+
+
+def prune_captures(directory, keep=None):
+    """Delete all but the newest `keep` captures"""
+    keep = PROFILE_KEEP if keep is None else keep
+    stems = {}
+    for path in Path(directory).iterdir():
+        if path.suffix in CAPTURE_SUFFIXES:
+            stems.setdefault(path.with_suffix(''), []).append(path)
+
+    # Stems start with a timestamp, so names sort by age
+    for stem in sorted(stems, reverse=True)[keep:]:
+        for path in stems[stem]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def list_captures(profile_dir=None):
+    """Metadata of the captures on disk, newest first"""
+    directory = Path(profile_dir or PROFILE_DIR)
+    if not directory.exists():
+        return []
+    captures = []
+    for path in sorted(directory.glob('*.json'), reverse=True):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        meta['profile'] = str(path.with_suffix('.prof'))
+        captures.append(meta)
+    return captures
@@ -0,0 +1,255 @@
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import (
+    QUERY_LOG_ENABLED,
+    QUERY_LOG_PATH,
+    QUERY_LOG_MAX_BYTES,
+    QUERY_LOG_BACKUPS,
+    QUERY_LOG_QUEUE_MAX
+)
+from src.rate_limiter import LLM_BUSY_MESSAGE, ERROR_ANSWER_PREFIXES
+
+ANSWERED_OUTCOMES = ('answered', 'fallback')
+# Outcomes that went through retrieval; others (mapping, bootstrapping,
+# unavailable, ...) have no sections by design and are never "zero-hit"
+RETRIEVAL_OUTCOMES = ANSWERED_OUTCOMES + ('no_context',)
+
+
+def normalize_query(query):
+    """The one query normalization: log aggregation, coalescing keys and batch dedup"""
+    return " ".join(query.lower().split())
+
+
+def result_ids(results):
+    """Stable identity of the retrieved sections/chunks"""
+    return tuple(
+        str(r['metadata'].get('section', f"{r['metadata'].get('source')}#{r['metadata'].get('chunk_index')}"))
+        for r in results
+    )
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def build_record(timestamp, query, trace, total_ms):
+    """One JSONL record; runs on the writer thread, not the request thread"""
+    results = trace.get('results') or []
+    outcome = trace.get('outcome', 'answered')
+    answer = trace.get('answer') or ""
+    if outcome == 'answered':
+        if answer.startswith(LLM_BUSY_MESSAGE):
+            outcome = 'busy'
+        elif answer.startswith(ERROR_ANSWER_PREFIXES):
+            outcome = 'error'
+
+    retrieval_ms = trace.get('retrieval_ms')
+    timings = {'total_ms': round(total_ms, 1)}
+    if retrieval_ms is not None:
+        timings['retrieval_ms'] = round(retrieval_ms, 1)
+        if outcome in ('answered', 'busy', 'error'):
+            timings['generation_ms'] = round(total_ms - retrieval_ms, 1)
+
+    return {
+        'ts': datetime.fromtimestamp(timestamp).isoformat(timespec='milliseconds'),
+        'query': normalize_query(query),
+        'outcome': outcome,
+        'sections': list(result_ids(results)),
+        'scores': [round(float(r['score']), 4) for r in results],
+        'timings': timings,
+        'cache': {
+            'coalesced': bool(trace.get('coalesced')),
+            'follow_up_reuse': bool(trace.get('follow_up'))
+        }
+    }
+
+
+class QueryLog:
+    """Append-only, size-rotated JSONL log fed through a bounded queue"""
+
+    def __init__(self, path=None, max_bytes=None, backups=None, queue_max=None):
+        self.path = Path(path or QUERY_LOG_PATH)
+        self.max_bytes = max_bytes or QUERY_LOG_MAX_BYTES
+        self.backups = QUERY_LOG_BACKUPS if backups is None else backups
+        self._queue = queue.Queue(maxsize=queue_max or QUERY_LOG_QUEUE_MAX)
+        self.written = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="query-log", daemon=True)
+        self._thread.start()
+
+    def log(self, query, trace, total_ms):
+        """Never blocks the request: records are dropped when the writer falls behind"""
+        try:
+            self._queue.put_nowait((time.time(), query, trace, total_ms))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            try:
+                line = json.dumps(build_record(*item), ensure_ascii=False) + "\n"
+                self._write(line)
+                self.written += 1
+            except Exception as e:
+                print(f"⚠️ Query log write failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, line):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists() and self.path.stat().st_size + len(line) > self.max_bytes:
+            self._rotate()
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+    def _rotate(self):
+        """queries.jsonl -> .1 -> .2 ...; the oldest beyond `backups` is deleted"""
+        for n in range(self.backups, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{n - 1}") if n > 1 else self.path
+            target = self.path.with_name(f"{self.path.name}.{n}")
+            if source.exists():
+                os.replace(source, target)
+        if self.backups == 0:
+            self.path.unlink()
+
+    def flush(self):
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+
+_query_log = None
+_query_log_lock = threading.Lock()
+
+
+def get_query_log():
+    global _query_log
+    if _query_log is None:
+        with _query_log_lock:
+            if _query_log is None:
+                _query_log = QueryLog()
+                atexit.register(_query_log.close)
+    return _query_log
+
+
+def log_query(query, trace, total_ms):
+    if QUERY_LOG_ENABLED:
+        get_query_log().log(query, trace, total_ms)
+
+
+def read_log(path=None):
+    """Records from the active log and its rotated files, oldest first"""
+    path = Path(path or QUERY_LOG_PATH)
+    files = [path.with_name(f"{path.name}.{n}") for n in range(QUERY_LOG_BACKUPS, 0, -1)] + [path]
+    for file in files:
+        if not file.exists():
+            continue
+        with open(file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def analyze(records, top=20):
+    by_query = {}
+    totals = []
+    for record in records:
+        total = record['timings']['total_ms']
+        totals.append(total)
+        stats = by_query.setdefault(
+            record['query'], {'count': 0, 'latencies': [], 'outcomes': {}, 'retrieved': 0, 'misses': 0}
+        )
+        stats['count'] += 1
+        stats['latencies'].append(total)
+        stats['outcomes'][record['outcome']] = stats['outcomes'].get(record['outcome'], 0) + 1
+        if record['outcome'] in RETRIEVAL_OUTCOMES:
+            stats['retrieved'] += 1
+            if not record['sections'] or record['outcome'] == 'no_context':
+                stats['misses'] += 1
+
+    def summary(query):
+        stats = by_query[query]
+        return {
+            'query': query,
+            'count': stats['count'],
+            'p50_ms': round(percentile(stats['latencies'], 50), 1),
+            'max_ms': round(max(stats['latencies']), 1),
+            'outcomes': stats['outcomes']
+        }
+
+    top_queries = sorted(by_query, key=lambda q: -by_query[q]['count'])[:top]
+    slowest = sorted(by_query, key=lambda q: -percentile(by_query[q]['latencies'], 50))[:top]
+    zero_hit = sorted(
+        (q for q, s in by_query.items() if s['misses']),
+        key=lambda q: -by_query[q]['count']
+    )[:top]
+    # Worth precomputing: asked repeatedly, answerable, and expensive
+    warm = sorted(
+        (q for q, s in by_query.items()
+         if s['count'] >= 2 and any(o in ANSWERED_OUTCOMES for o in s['outcomes'])),
+        key=lambda q: -by_query[q]['count'] * percentile(by_query[q]['latencies'], 50)
+    )[:top]
+
+    return {
+        'records': len(totals),
+        'unique_queries': len(by_query),
+        'latency': {f"p{p}_ms": round(percentile(totals, p), 1) for p in (50, 90, 95, 99)},
+        'top_queries': [summary(q) for q in top_queries],
+        'slowest_queries': [summary(q) for q in slowest],
+        'zero_hit_queries': [summary(q) for q in zero_hit],
+        'cache_warm_candidates': [summary(q) for q in warm]
+    }
+
+
+def print_report(report):
+    print(f"📒 {report['records']} queries ({report['unique_queries']} unique)")
+    print("Latency: " + ", ".join(f"{k}={v}" for k, v in report['latency'].items()))
+    for title, key in (("🔥 Top queries", 'top_queries'), ("🐢 Slowest queries (median)", 'slowest_queries'),
+                       ("🕳️ Zero-hit queries", 'zero_hit_queries'), ("♨️ Suggested cache-warm list", 'cache_warm_candidates')):
+        print(f"\n{title}")
+        if not report[key]:
+            print("   (none)")
+        for row in report[key]:
+            print(f"   {row['count']:>5}x  p50 {row['p50_ms']:>8} ms  {row['query'][:70]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze the structured query log")
+    parser.add_argument("command", choices=["analyze"])
+    parser.add_argument("--log", default=None, help=f"Log file (default: {QUERY_LOG_PATH})")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--json", default=None, help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = analyze(read_log(args.log), args.top)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
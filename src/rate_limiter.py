@@ -0,0 +1,243 @@
+import sys
+import time
+import asyncio
+import heapq
+import itertools
+import threading
+from collections import deque
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import (
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    LLM_QUEUE_MAX,
+    LLM_QUEUE_TIMEOUT,
+    LLM_RATE_LIMIT_BACKOFF
+)
+
+# Lower value is served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+# How often an asyncio waiter re-checks the queue; it cannot wait on the Condition
+ASYNC_POLL_SECONDS = 0.05
+
+LLM_BUSY_MESSAGE = (
+    "⏳ The legal assistant is handling a lot of questions right now. "
+    "Please try again in a moment."
+)
+LLM_UNAVAILABLE_MESSAGE = "IPC legal information service temporarily unavailable."
+LLM_ERROR_PREFIX = "Legal information service error"
+# RAG answers report LLM failures as answer text starting with one of these
+ERROR_ANSWER_PREFIXES = (LLM_ERROR_PREFIX, LLM_UNAVAILABLE_MESSAGE, LLM_BUSY_MESSAGE)
+
+
+class LLMBusyError(Exception):
+    """Raised when an LLM call cannot get quota within its wait budget"""
+
+
+def estimate_prompt_tokens(text, max_completion_tokens=0):
+    """Rough token count (~4 characters per token) plus the completion allowance"""
+    return len(text) // 4 + 1 + max_completion_tokens
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def seconds_until(self, amount):
+        missing = amount - self.level
+        return 0.0 if missing <= 0 else missing / self.rate
+
+
+class LLMRateLimiter:
+    """Requests/min and tokens/min buckets with a bounded priority wait queue"""
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, queue_max=None):
+        self.requests = TokenBucket(requests_per_minute or LLM_REQUESTS_PER_MINUTE)
+        self.tokens = TokenBucket(tokens_per_minute or LLM_TOKENS_PER_MINUTE)
+        self.queue_max = LLM_QUEUE_MAX if queue_max is None else queue_max
+        self._condition = threading.Condition()
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+
+        # Metrics
+        self.granted = 0
+        self.rejected = 0
+        self.rate_limited = 0
+        self._wait_times = deque(maxlen=1000)
+
+    def _grant(self, ticket, cost, start):
+        """Take quota for ticket if it is at the head of the queue; otherwise seconds to wait.
+
+        Returns None once granted. Called with the condition held.
+        """
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        wait = max(
+            self._paused_until - now,
+            self.requests.seconds_until(1),
+            self.tokens.seconds_until(cost)
+        )
+        if self._waiters[0] != ticket or wait > 0:
+            return wait
+        self.requests.level -= 1
+        self.tokens.level -= cost
+        self.granted += 1
+        self._wait_times.append(now - start)
+        return None
+
+    def _enqueue(self, priority):
+        if len(self._waiters) >= self.queue_max:
+            self.rejected += 1
+            raise LLMBusyError("LLM wait queue is full")
+        ticket = (priority, next(self._sequence))
+        heapq.heappush(self._waiters, ticket)
+        return ticket
+
+    def _dequeue(self, ticket):
+        self._waiters.remove(ticket)
+        heapq.heapify(self._waiters)
+        self._condition.notify_all()
+
+    def _budget(self, estimated_tokens, priority, timeout):
+        if timeout is None and priority == PRIORITY_INTERACTIVE:
+            timeout = LLM_QUEUE_TIMEOUT
+        # A single oversized request must still be able to run eventually
+        cost = min(float(estimated_tokens), self.tokens.capacity)
+        start = time.monotonic()
+        return cost, start, (start + timeout if timeout is not None else None)
+
+    def acquire(self, estimated_tokens, priority=PRIORITY_INTERACTIVE, timeout=None):
+        """Block until quota is available; raises LLMBusyError when it is not in time"""
+        cost, start, deadline = self._budget(estimated_tokens, priority, timeout)
+
+        with self._condition:
+            ticket = self._enqueue(priority)
+            try:
+                while True:
+                    wait = self._grant(ticket, cost, start)
+                    if wait is None:
+                        break
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.rejected += 1
+                            raise LLMBusyError("Timed out waiting for LLM quota")
+                        wait = min(wait, remaining) if wait > 0 else remaining
+                    # Sleep until quota refills, or until the head of the queue changes
+                    self._condition.wait(timeout=wait if wait > 0 else None)
+            finally:
+                self._dequeue(ticket)
+
+    async def acquire_async(self, estimated_tokens, priority=PRIORITY_INTERACTIVE, timeout=None):
+        """acquire() for coroutines: waits in the same queue without holding a thread"""
+        cost, start, deadline = self._budget(estimated_tokens, priority, timeout)
+
+        with self._condition:
+            ticket = self._enqueue(priority)
+        try:
+            while True:
+                with self._condition:
+                    wait = self._grant(ticket, cost, start)
+                if wait is None:
+                    return
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        raise LLMBusyError("Timed out waiting for LLM quota")
+                    wait = min(wait, remaining)
+                await asyncio.sleep(min(wait, ASYNC_POLL_SECONDS) if wait > 0 else ASYNC_POLL_SECONDS)
+        finally:
+            # Also runs when the waiting task is cancelled
+            with self._condition:
+                self._dequeue(ticket)
+
+    def pause(self, seconds=None):
+        """Stop granting quota for a while, e.g. after the API answers 429"""
+        with self._condition:
+            self.rate_limited += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + (seconds or LLM_RATE_LIMIT_BACKOFF))
+            self._condition.notify_all()
+
+    def is_busy(self):
+        """True when new interactive requests would have to queue"""
+        with self._condition:
+            now = time.monotonic()
+            self.requests.refill(now)
+            return bool(self._waiters) or self.requests.level < 1 or now < self._paused_until
+
+    def stats(self):
+        # query_log imports this module, so import its helper lazily
+        from src.query_log import percentile
+
+        with self._condition:
+            waits = list(self._wait_times)
+            queue_depth = len(self._waiters)
+
+        return {
+            'queue_depth': queue_depth,
+            'granted': self.granted,
+            'rejected': self.rejected,
+            'rate_limited': self.rate_limited,
+            'wait_p50_s': round(percentile(waits, 50), 3),
+            'wait_p95_s': round(percentile(waits, 95), 3),
+            'wait_max_s': round(max(waits), 3) if waits else 0.0
+        }
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_llm_limiter():
+    """Process-wide limiter: the quota belongs to the API key, not to one RAG instance"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = LLMRateLimiter()
+    return _limiter
+
+
+def is_rate_limit_error(error):
+    """Groq raises RateLimitError (HTTP 429) when our quota is exhausted"""
+    return getattr(error, 'status_code', None) == 429 or type(error).__name__ == 'RateLimitError'
+
+
+def call_llm(create, prompt_text, max_tokens, priority=PRIORITY_INTERACTIVE):
+    """Run create() once quota allows; a 429 pauses the limiter and surfaces as busy"""
+    limiter = get_llm_limiter()
+    limiter.acquire(estimate_prompt_tokens(prompt_text, max_tokens), priority)
+    try:
+        return create()
+    except Exception as e:
+        if is_rate_limit_error(e):
+            limiter.pause()
+            raise LLMBusyError(str(e)) from e
+        raise
+
+
+async def call_llm_async(create, prompt_text, max_tokens, priority=PRIORITY_INTERACTIVE):
+    """call_llm for an async client: create() returns the awaitable API call"""
+    limiter = get_llm_limiter()
+    await limiter.acquire_async(estimate_prompt_tokens(prompt_text, max_tokens), priority)
+    try:
+        return await create()
+    except Exception as e:
+        if is_rate_limit_error(e):
+            limiter.pause()
+            raise LLMBusyError(str(e)) from e
+        raise
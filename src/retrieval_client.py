@@ -0,0 +1,108 @@
+import sys
+import json
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import RETRIEVAL_SERVER_URL, RETRIEVAL_TIMEOUT
+
+
+class RetrievalClient:
+    """Drop-in replacement for FAISSSearch that talks to src/retrieval_server.py"""
+
+    def __init__(self, base_url=None, timeout=None):
+        self.base_url = (base_url or RETRIEVAL_SERVER_URL).rstrip('/')
+        self.timeout = timeout or RETRIEVAL_TIMEOUT
+        self.kb_path = None
+        self.loaded = False
+
+    def _request(self, path, payload=None):
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=data,
+            headers={'Content-Type': 'application/json'}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def health(self):
+        try:
+            return self._request('/health')
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            return {'status': 'unavailable', 'error': str(e)}
+
+    def load_knowledge_base(self, kb_path=None):
+        """Succeeds if the server is up and serving the requested knowledge base"""
+        health = self.health()
+        if health.get('status') != 'ok':
+            print(f"❌ Retrieval server at {self.base_url} unavailable: {health.get('error', health.get('status'))}")
+            return False
+        if kb_path is not None and Path(health['kb_path']) != Path(kb_path):
+            print(f"❌ Retrieval server serves {health['kb_path']}, not {kb_path}")
+            return False
+
+        self.kb_path = health['kb_path']
+        self.loaded = True
+        print(f"✅ Using retrieval server at {self.base_url} ({health['sections']} sections)")
+        return True
+
+    def start_watcher(self, interval=None):
+        """The server watches for new KB versions itself"""
+
+    def stop_watcher(self):
+        pass
+
+    def search(self, query, k=3):
+        results = self.search_batch([query], [k])
+        return results[0] if results else []
+
+    def search_batch(self, queries, ks):
+        """Search several queries in one round trip"""
+        try:
+            if len(set(ks)) == 1:
+                return self._request('/search', {'queries': list(queries), 'k': ks[0]})['results']
+            return [self._request('/search', {'queries': [q], 'k': k})['results'][0] for q, k in zip(queries, ks)]
+        except (urllib.error.URLError, OSError, ValueError, KeyError) as e:
+            print(f"❌ Search failed: {e}")
+            return [[] for _ in queries]
+
+    def get_section(self, section):
+        try:
+            return self._request('/section/' + urllib.parse.quote(str(section).strip()))
+        except urllib.error.HTTPError as e:
+            if e.code != 404:
+                print(f"❌ Section lookup failed: {e}")
+            return None
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            print(f"❌ Section lookup failed: {e}")
+            return None
+
+    def get_cross_references(self, section):
+        try:
+            return self._request('/references/' + urllib.parse.quote(str(section).strip()))['references']
+        except (urllib.error.URLError, OSError, ValueError, KeyError) as e:
+            print(f"❌ Cross-reference lookup failed: {e}")
+            return []
+
+    def get_equivalents(self, section, code='ipc'):
+        try:
+            return self._request(f'/equivalents/{code}/' + urllib.parse.quote(str(section).strip()))
+        except urllib.error.HTTPError as e:
+            if e.code != 404:
+                print(f"❌ IPC↔BNS lookup failed: {e}")
+            return None
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            print(f"❌ IPC↔BNS lookup failed: {e}")
+            return None
+
+
+def create_searcher():
+    """Searcher for the RAG classes: the shared server if configured, else in-process FAISS"""
+    if RETRIEVAL_SERVER_URL:
+        return RetrievalClient()
+    from src.faiss_search import FAISSSearch
+    return FAISSSearch()
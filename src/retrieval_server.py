@@ -0,0 +1,151 @@
+import sys
+import json
+import argparse
+from pathlib import Path
+from urllib.parse import unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import RETRIEVAL_SERVER_HOST, RETRIEVAL_SERVER_PORT, SEARCH_BATCHING
+from src.faiss_search import FAISSSearch
+
+DEFAULT_KNOWLEDGE_BASES = [
+    "knowledge_base/ipc_complete",
+    "knowledge_base/faiss_db",  # fallback
+]
+
+
+def to_json_result(result):
+    """FAISS scores are numpy floats; make results JSON-serialisable"""
+    return {
+        'content': result['content'],
+        'metadata': result['metadata'],
+        'score': float(result['score'])
+    }
+
+
+class RetrievalHandler(BaseHTTPRequestHandler):
+    # Set by serve()
+    searcher = None
+
+    def log_message(self, format, *args):
+        # Keep stdout for startup/swap messages, not per-request noise
+        pass
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self):
+        if self.path == '/health':
+            searcher = self.searcher
+            self.send_json({
+                'status': 'ok' if searcher.loaded else 'loading',
+                'kb_path': str(searcher.kb_path) if searcher.kb_path else None,
+                'version': searcher.version,
+                'sections': len(searcher.texts) if searcher.texts else 0,
+                'batching': searcher.batch_stats(),
+                'memory': searcher.memory_stats()
+            })
+        elif self.path.startswith('/references/'):
+            section = unquote(self.path[len('/references/'):])
+            self.send_json({'references': self.searcher.get_cross_references(section)})
+        elif self.path.startswith('/equivalents/'):
+            # /equivalents/<ipc|bns>/<section>
+            code, _, section = self.path[len('/equivalents/'):].partition('/')
+            result = self.searcher.get_equivalents(unquote(section), code)
+            if result is None:
+                self.send_json({'error': 'section not found'}, status=404)
+            else:
+                self.send_json(result)
+        elif self.path.startswith('/section/'):
+            result = self.searcher.get_section(unquote(self.path[len('/section/'):]))
+            if result is None:
+                self.send_json({'error': 'section not found'}, status=404)
+            else:
+                self.send_json(to_json_result(result))
+        else:
+            self.send_json({'error': 'not found'}, status=404)
+
+    def do_POST(self):
+        try:
+            request = self.read_json()
+        except ValueError:
+            self.send_json({'error': 'invalid JSON'}, status=400)
+            return
+
+        try:
+            if self.path == '/search':
+                self.send_json({'results': self.search(request)})
+            elif self.path == '/sections':
+                results = [self.searcher.get_section(s) for s in request.get('sections', [])]
+                self.send_json({'results': [to_json_result(r) if r else None for r in results]})
+            else:
+                self.send_json({'error': 'not found'}, status=404)
+        except Exception as e:
+            self.send_json({'error': str(e)}, status=500)
+
+    def search(self, request):
+        """Search a batch of queries: {"queries": [...], "k": 5}"""
+        queries = request.get('queries') or []
+        k = int(request.get('k', 3))
+        if not queries:
+            return []
+
+        if SEARCH_BATCHING:
+            # Submit individually so queries from all clients share micro-batches
+            batcher = self.searcher.get_batcher()
+            futures = [batcher.submit(query, k) for query in queries]
+            batch_results = [future.result() for future in futures]
+        else:
+            batch_results = self.searcher.search_batch(queries, [k] * len(queries))
+
+        return [[to_json_result(r) for r in results] for results in batch_results]
+
+
+def serve(kb_paths=None, host=None, port=None):
+    """Load one knowledge base and serve it until interrupted"""
+    searcher = FAISSSearch()
+    for kb_path in kb_paths or DEFAULT_KNOWLEDGE_BASES:
+        if searcher.load_knowledge_base(kb_path):
+            break
+    else:
+        print("❌ No knowledge base could be loaded")
+        return False
+
+    searcher.start_watcher()
+    RetrievalHandler.searcher = searcher
+
+    server = ThreadingHTTPServer((host or RETRIEVAL_SERVER_HOST, port or RETRIEVAL_SERVER_PORT), RetrievalHandler)
+    server.daemon_threads = True
+    print(f"🛰️ Retrieval server listening on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Retrieval server stopped")
+    finally:
+        server.server_close()
+        searcher.stop_watcher()
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve FAISS retrieval to multiple app workers")
+    parser.add_argument("--kb", action="append", help="Knowledge base path (repeat for fallbacks)")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args()
+    serve(args.kb, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
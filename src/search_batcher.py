@@ -0,0 +1,91 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class SearchBatcher:
+    """Collects concurrent search requests into micro-batches run on one worker thread"""
+
+    def __init__(self, handler, max_wait_ms=5, max_batch=32):
+        # handler(queries, ks) -> list of result lists, one per query
+        self.handler = handler
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._active = 0
+        self._active_lock = threading.Lock()
+
+        # Metrics
+        self.requests = 0
+        self.processed = 0
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.max_batch_seen = 0
+
+        self._worker = threading.Thread(target=self._run, name="search-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, query, k):
+        """Queue one search and return a Future for its results"""
+        future = Future()
+        with self._active_lock:
+            self._active += 1
+            self.requests += 1
+        future.add_done_callback(self._release)
+        self._queue.put((query, k, future))
+        depth = self._queue.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+        return future
+
+    def search(self, query, k):
+        return self.submit(query, k).result()
+
+    def _release(self, _future):
+        with self._active_lock:
+            self._active -= 1
+
+    def _collect(self):
+        """Block for one request, then gather more until the batch is full or stale"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            # Every caller currently waiting is already in this batch
+            if len(batch) >= self._active:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            self.batches += 1
+            self.processed += len(batch)
+            if len(batch) > self.max_batch_seen:
+                self.max_batch_seen = len(batch)
+            try:
+                results = self.handler([item[0] for item in batch], [item[1] for item in batch])
+                for (_, _, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def stats(self):
+        return {
+            'queue_depth': self._queue.qsize(),
+            'in_flight': self._active,
+            'max_queue_depth': self.max_queue_depth,
+            'requests': self.requests,
+            'batches': self.batches,
+            'avg_batch_size': self.processed / self.batches if self.batches else 0.0,
+            'max_batch_size': self.max_batch_seen
+        }
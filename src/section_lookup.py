@@ -0,0 +1,106 @@
+import re
+import sys
+import json
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import BNS_PDF_PATH
+from src.cross_references import build_cross_reference_graph, section_key
+
+IPC_JSON_PATH = "data/ipc/ipc_sections.json"
+# Inputs of knowledge_base/ipc_complete; a change to either makes it stale
+IPC_KB_SOURCES = [IPC_JSON_PATH, BNS_PDF_PATH]
+
+# "section 302", "sec. 120B", "§420", "IPC 376"
+SECTION_QUERY_PATTERN = re.compile(r"(?:\bsections?|\bsec\.?|§|\bipc)\s*(\d{1,3}[A-Z]{0,3})\b", re.IGNORECASE)
+
+
+def section_text(section):
+    """Searchable text of one IPC section, as stored in the knowledge base"""
+    return (
+        f"IPC Section {section['Section']} | "
+        f"Title: {section['section_title']} | "
+        f"Description: {section['section_desc']} | "
+        f"Chapter {section['chapter']}: {section['chapter_title']}"
+    )
+
+
+def section_metadata(section):
+    return {
+        "source": "Indian Penal Code",
+        "section": section['Section'],
+        "section_title": section['section_title'],
+        "chapter": section['chapter'],
+        "chapter_title": section['chapter_title'],
+        "type": "ipc_section"
+    }
+
+
+def load_ipc_sections(json_path=IPC_JSON_PATH):
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def find_section_numbers(query):
+    """Section numbers named explicitly in a query"""
+    return [section_key(match) for match in SECTION_QUERY_PATTERN.findall(query)]
+
+
+class JSONSectionSearcher:
+    """Exact-section lookups straight from ipc_sections.json, with no model or index.
+
+    Stands in for FAISSSearch while the vector index is unavailable: queries
+    naming a section number are answered, anything else finds nothing.
+    """
+
+    def __init__(self, json_path=IPC_JSON_PATH):
+        self.json_path = json_path
+        self.kb_path = None
+        self.loaded = False
+        self.sections = {}
+        self.cross_references = {}
+
+    def load_knowledge_base(self, kb_path=None):
+        try:
+            ipc_data = load_ipc_sections(self.json_path)
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not read {self.json_path}: {e}")
+            return False
+
+        self.sections = {
+            section_key(section['Section']): {
+                'content': section_text(section),
+                'metadata': section_metadata(section),
+                'score': 1.0
+            }
+            for section in ipc_data
+        }
+        self.cross_references = build_cross_reference_graph(ipc_data)
+        self.kb_path = self.json_path
+        self.loaded = True
+        print(f"📖 Exact-section lookup ready ({len(self.sections)} sections from {self.json_path})")
+        return True
+
+    def start_watcher(self, interval=None):
+        pass
+
+    def stop_watcher(self):
+        pass
+
+    def get_section(self, section):
+        return self.sections.get(section_key(section))
+
+    def get_cross_references(self, section):
+        return self.cross_references.get(section_key(section), [])
+
+    def get_equivalents(self, section, code='ipc'):
+        # The IPC<->BNS table is built with the vector index
+        return None
+
+    def search(self, query, k=3):
+        results = [self.sections[key] for key in find_section_numbers(query) if key in self.sections]
+        return results[:k]
+
+    def search_batch(self, queries, ks):
+        return [self.search(query, k) for query, k in zip(queries, ks)]
@@ -0,0 +1,138 @@
+import re
+import sys
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.cross_references import section_key
+from src.section_lookup import IPC_JSON_PATH, load_ipc_sections
+
+# "section 49", "sec. 12", "§ 30", "ipc 3" -> number prefix search
+NUMBER_QUERY_PATTERN = re.compile(r"^(?:(?:sections?|sec|ipc|§)\s*)*(\d{1,3}[a-z]{0,3})$")
+MIN_TRIGRAM_SCORE = 0.5
+
+
+def normalize(text):
+    return " ".join(re.sub(r"[^a-z0-9§]+", " ", str(text).lower()).split())
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def section_order(key):
+    """Natural order of section numbers: 120, 120A, 120B, 121"""
+    match = re.match(r"(\d+)(.*)", key)
+    return (int(match.group(1)), match.group(2)) if match else (10 ** 6, key)
+
+
+class SectionSuggester:
+    """In-memory prefix/trigram index over IPC section numbers and titles.
+
+    Number prefixes ("section 49") and title prefixes at any word
+    ("breach of tr") come from sorted arrays searched with bisect;
+    misspelt titles fall back to trigram overlap.
+    """
+
+    def __init__(self, sections):
+        # sections: [(section, title, chapter), ...]
+        self.entries = []
+        self.numbers = []   # sorted section keys
+        self.prefixes = []  # sorted (title suffix starting at a word, entry id, word position)
+        self.grams = {}     # trigram -> entry ids
+
+        for entry_id, (section, title, chapter) in enumerate(sections):
+            key = section_key(section)
+            norm_title = normalize(title)
+            self.entries.append({'section': key, 'title': title, 'chapter': chapter})
+            self.numbers.append((key.lower(), entry_id))
+
+            words = norm_title.split()
+            for position in range(len(words)):
+                self.prefixes.append((" ".join(words[position:]), entry_id, position))
+
+            grams = trigrams(norm_title)
+            for gram in grams:
+                self.grams.setdefault(gram, []).append(entry_id)
+
+        self.numbers.sort()
+        self.prefixes.sort()
+
+    @classmethod
+    def from_ipc_data(cls, ipc_data):
+        return cls([(s['Section'], s['section_title'], s.get('chapter')) for s in ipc_data])
+
+    @classmethod
+    def from_json(cls, json_path=IPC_JSON_PATH):
+        start = time.perf_counter()
+        suggester = cls.from_ipc_data(load_ipc_sections(json_path))
+        print(f"🔎 Section suggestions ready ({len(suggester.entries)} sections, "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms)")
+        return suggester
+
+    def suggest(self, text, limit=8):
+        """Sections whose number or title starts with / resembles the typed text"""
+        query = normalize(text)
+        if not query:
+            return []
+
+        number = NUMBER_QUERY_PATTERN.match(query)
+        if number:
+            ids = self.number_matches(number.group(1), limit)
+        else:
+            ids = self.title_matches(query, limit)
+            if len(ids) < limit:
+                ids += [i for i in self.fuzzy_matches(query, limit) if i not in ids][:limit - len(ids)]
+
+        return [self.suggestion(entry_id) for entry_id in ids]
+
+    def number_matches(self, prefix, limit):
+        start = bisect_left(self.numbers, (prefix,))
+        matches = []
+        for key, entry_id in self.numbers[start:]:
+            if not key.startswith(prefix):
+                break
+            matches.append(entry_id)
+        # "49" should offer 49, 49A, ... before 490-499
+        matches.sort(key=lambda i: (len(self.entries[i]['section']), section_order(self.entries[i]['section'])))
+        return matches[:limit]
+
+    def title_matches(self, query, limit):
+        start = bisect_left(self.prefixes, (query,))
+        best = {}
+        for suffix, entry_id, position in self.prefixes[start:]:
+            if not suffix.startswith(query):
+                break
+            if entry_id not in best or position < best[entry_id]:
+                best[entry_id] = position
+        # Title starts first, then shorter titles
+        ranked = sorted(best, key=lambda i: (best[i], len(self.entries[i]['title']), section_order(self.entries[i]['section'])))
+        return ranked[:limit]
+
+    def fuzzy_matches(self, query, limit):
+        query_grams = trigrams(query)
+        shared = {}
+        for gram in query_grams:
+            for entry_id in self.grams.get(gram, ()):
+                shared[entry_id] = shared.get(entry_id, 0) + 1
+
+        scored = []
+        for entry_id, count in shared.items():
+            # Containment of the typed text in the title, so long titles are not penalised
+            score = count / len(query_grams)
+            if score >= MIN_TRIGRAM_SCORE:
+                scored.append((-score, len(self.entries[entry_id]['title']), entry_id))
+        scored.sort()
+        return [entry_id for _, _, entry_id in scored[:limit]]
+
+    def suggestion(self, entry_id):
+        entry = self.entries[entry_id]
+        return {
+            'section': entry['section'],
+            'title': entry['title'],
+            'chapter': entry['chapter'],
+            'label': f"§{entry['section']} — {entry['title']}"
+        }
@@ -0,0 +1,208 @@
+import asyncio
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+
+
+class Flight:
+    """One in-flight computation whose streamed tokens and result are shared by all waiters"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._tokens = []
+        self._done = False
+        self._result = None
+        self._error = None
+
+    def emit(self, token):
+        """Publish a streamed token to every subscriber"""
+        with self._condition:
+            self._tokens.append(token)
+            self._condition.notify_all()
+
+    def finish(self, result):
+        with self._condition:
+            self._result = result
+            self._done = True
+            self._condition.notify_all()
+
+    def fail(self, error):
+        with self._condition:
+            self._error = error
+            self._done = True
+            self._condition.notify_all()
+
+    def done(self):
+        return self._done
+
+    def result(self, timeout=None):
+        """Block for the final result (same contract as Future.result)"""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._done, timeout=timeout):
+                raise FutureTimeout()
+            if self._error is not None:
+                raise self._error
+            return self._result
+
+    def iter_tokens(self, timeout=None):
+        """Replay tokens streamed so far, then follow new ones until done.
+
+        Raises TimeoutError if no new token arrives within timeout seconds.
+        """
+        position = 0
+        while True:
+            with self._condition:
+                if not self._condition.wait_for(
+                    lambda: self._done or len(self._tokens) > position, timeout=timeout
+                ):
+                    raise FutureTimeout()
+                new_tokens = self._tokens[position:]
+                finished = self._done
+            for token in new_tokens:
+                yield token
+            position += len(new_tokens)
+            if finished and position >= len(self._tokens):
+                return
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key onto one Flight"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def run(self, key, fn, executor):
+        """Start fn(flight) on executor unless an identical call is in flight.
+
+        Returns (flight, is_leader).
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = Flight()
+            self._flights[key] = flight
+            self.leaders += 1
+
+        def execute():
+            try:
+                result = fn(flight)
+            except Exception as e:
+                self._forget(key, flight)
+                flight.fail(e)
+            else:
+                self._forget(key, flight)
+                flight.finish(result)
+
+        executor.submit(execute)
+        return flight, True
+
+    def _forget(self, key, flight):
+        # Later identical requests start a fresh computation
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._flights)
+        total = self.leaders + self.coalesced
+        return {
+            'in_flight': in_flight,
+            'computations': self.leaders,
+            'coalesced': self.coalesced,
+            'coalesced_ratio': self.coalesced / total if total else 0.0
+        }
+
+
+class AsyncFlight:
+    """Flight for coroutines: one task whose tokens and result are shared by its waiters"""
+
+    def __init__(self):
+        self.task = None
+        self.waiters = 0
+        self._tokens = []
+        self._changed = asyncio.get_running_loop().create_future()
+
+    def emit(self, token):
+        self._tokens.append(token)
+        self._notify()
+
+    def _notify(self, *_):
+        if not self._changed.done():
+            self._changed.set_result(None)
+        self._changed = asyncio.get_running_loop().create_future()
+
+    async def iter_tokens(self):
+        """Replay tokens streamed so far, then follow new ones until the task is done"""
+        position = 0
+        while True:
+            changed = self._changed
+            while position < len(self._tokens):
+                yield self._tokens[position]
+                position += 1
+            if self.task.done():
+                return
+            if changed is self._changed:
+                # Shielded: cancelling one waiter must not cancel the future the others wait on
+                await asyncio.shield(changed)
+
+
+class AsyncSingleFlight:
+    """Coalesces concurrent coroutines with the same key onto one task.
+
+    The shared task is cancelled when its last waiter goes away (e.g. every
+    client asking that question disconnected), not when the first one does.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    async def run(self, key, fn, on_token=None):
+        """Result of fn(flight), shared with identical concurrent calls; tokens go to on_token.
+
+        Returns (result, is_leader).
+        """
+        flight = self._flights.get(key)
+        is_leader = flight is None
+        if is_leader:
+            flight = AsyncFlight()
+            flight.task = asyncio.ensure_future(fn(flight))
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            flight.task.add_done_callback(flight._notify)
+            self._flights[key] = flight
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            async for token in flight.iter_tokens():
+                if on_token:
+                    on_token(token)
+            return flight.task.result(), is_leader
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                self.cancelled += 1
+
+    def _forget(self, key, flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self):
+        total = self.leaders + self.coalesced
+        return {
+            'in_flight': len(self._flights),
+            'computations': self.leaders,
+            'coalesced': self.coalesced,
+            'coalesced_ratio': self.coalesced / total if total else 0.0,
+            'cancelled': self.cancelled
+        }
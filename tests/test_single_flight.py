@@ -0,0 +1,63 @@
+import sys
+import asyncio
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.single_flight import AsyncSingleFlight
+
+
+async def generate(flight, tokens=("a ", "b ", "c "), delay=0.02):
+    for token in tokens:
+        await asyncio.sleep(delay)
+        flight.emit(token)
+    return "".join(tokens)
+
+
+def test_cancelled_waiter_does_not_cancel_others():
+    async def scenario():
+        flights = AsyncSingleFlight()
+        seen = []
+        a = asyncio.ensure_future(flights.run("key", generate))
+        b = asyncio.ensure_future(flights.run("key", generate, on_token=seen.append))
+        await asyncio.sleep(0.03)
+        a.cancel()
+        result, is_leader = await b
+        try:
+            await a
+        except asyncio.CancelledError:
+            pass
+        return a.cancelled(), result, is_leader, seen, flights.stats()
+
+    a_cancelled, result, is_leader, seen, stats = asyncio.run(scenario())
+    assert a_cancelled
+    assert result == "a b c "
+    assert not is_leader
+    assert "".join(seen) == "a b c "
+    assert stats['computations'] == 1
+    assert stats['coalesced'] == 1
+    assert stats['cancelled'] == 0
+
+
+def test_last_waiter_leaving_cancels_generation():
+    async def scenario():
+        flights = AsyncSingleFlight()
+        started = []
+
+        async def slow(flight):
+            started.append(True)
+            await asyncio.sleep(10)
+
+        a = asyncio.ensure_future(flights.run("key", slow))
+        b = asyncio.ensure_future(flights.run("key", slow))
+        await asyncio.sleep(0.01)
+        a.cancel()
+        b.cancel()
+        await asyncio.gather(a, b, return_exceptions=True)
+        await asyncio.sleep(0)
+        return started, flights.stats()
+
+    started, stats = asyncio.run(scenario())
+    assert started == [True]
+    assert stats['cancelled'] == 1
+    assert stats['in_flight'] == 0
@@ -0,0 +1,124 @@
+import sys
+import time
+import textwrap
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import (
+    HISTORY_PAGE_SIZE,
+    MAX_HISTORY_MESSAGES,
+    MAX_HISTORY_CHARS,
+    SESSION_IDLE_TIMEOUT
+)
+
+
+def render_message(content: str) -> str:
+    """Markdown-ready text; the only form of a message that is stored"""
+    return textwrap.dedent(content).strip()
+
+
+def make_message(role: str, content: str, pinned: bool = False) -> Dict[str, Any]:
+    return {
+        "role": role,
+        "content": render_message(content),
+        "pinned": pinned
+    }
+
+
+def eviction_span(messages: List[Dict[str, Any]]) -> Optional[range]:
+    """Indexes of the oldest unpinned turn: a question together with its answer.
+
+    The newest message is never evicted, nor a turn it belongs to.
+    """
+    victim = next((i for i, m in enumerate(messages[:-1]) if not m.get("pinned")), None)
+    if victim is None:
+        return None
+    end = victim + 1
+    if messages[victim]["role"] == "user" and messages[end]["role"] == "assistant" and not messages[end].get("pinned"):
+        if end == len(messages) - 1:
+            return None
+        end += 1
+    return range(victim, end)
+
+
+def append_message(messages: List[Dict[str, Any]], role: str, content: str) -> int:
+    """Append a message and evict the oldest unpinned turns over the caps.
+
+    Returns the number of evicted messages.
+    """
+    messages.append(make_message(role, content))
+
+    evicted = 0
+    total_chars = sum(len(m["content"]) for m in messages)
+    while len(messages) > MAX_HISTORY_MESSAGES or total_chars > MAX_HISTORY_CHARS:
+        span = eviction_span(messages)
+        if span is None:
+            break
+        total_chars -= sum(len(messages[i]["content"]) for i in span)
+        del messages[span.start:span.stop]
+        evicted += len(span)
+    return evicted
+
+
+def visible_window(messages: List[Dict[str, Any]], pages: int) -> List[Dict[str, Any]]:
+    """Pinned messages plus the newest `pages` pages of the conversation"""
+    limit = HISTORY_PAGE_SIZE * max(1, pages)
+    pinned = [m for m in messages if m.get("pinned")]
+    recent = [m for m in messages if not m.get("pinned")][-limit:]
+    return pinned + recent
+
+
+def hidden_count(messages: List[Dict[str, Any]], pages: int) -> int:
+    """Messages older than the visible window"""
+    unpinned = sum(1 for m in messages if not m.get("pinned"))
+    return max(0, unpinned - HISTORY_PAGE_SIZE * max(1, pages))
+
+
+class SessionRegistry:
+    """Process-wide view of chat sessions so idle ones can release their history"""
+
+    def __init__(self, idle_timeout: Optional[float] = None):
+        self.idle_timeout = SESSION_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        self._lock = threading.Lock()
+        self._sessions = {}
+
+    def touch(self, session_id: str, messages: List[Dict[str, Any]]) -> bool:
+        """Record activity; returns True if this session's history had been evicted"""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            was_evicted = bool(entry and entry["evicted"])
+            self._sessions[session_id] = {
+                "last_seen": time.monotonic(),
+                "messages": messages,
+                "evicted": False
+            }
+            return was_evicted
+
+    def evict_idle(self) -> int:
+        """Drop the history of every session idle for longer than the timeout"""
+        now = time.monotonic()
+        evicted = 0
+        with self._lock:
+            for session_id, entry in list(self._sessions.items()):
+                idle = now - entry["last_seen"]
+                if entry["evicted"]:
+                    # Forget sessions that never came back
+                    if idle > 4 * self.idle_timeout:
+                        del self._sessions[session_id]
+                    continue
+                if idle < self.idle_timeout:
+                    continue
+                # Clearing in place frees the memory held by that session's state
+                entry["messages"][:] = [m for m in entry["messages"] if m.get("pinned")]
+                entry["messages"] = None
+                entry["evicted"] = True
+                evicted += 1
+        return evicted
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            active = sum(1 for e in self._sessions.values() if not e["evicted"])
+            return {"sessions": len(self._sessions), "active": active}
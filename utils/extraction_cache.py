@@ -0,0 +1,172 @@
+import os
+import sys
+import gzip
+import json
+import shutil
+import hashlib
+import argparse
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import EXTRACTION_CACHE_DIR
+
+# Bump whenever extract_pdf_pages changes the text it produces
+EXTRACTOR_VERSION = 1
+INDEX_FILE = "index.json"
+
+
+def file_sha256(file_path: str) -> str:
+    """Hash file content in blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extractor_tag() -> str:
+    """Identify the extractor so a PyPDF2 upgrade invalidates old entries"""
+    try:
+        import PyPDF2
+        library_version = PyPDF2.__version__
+    except Exception:
+        library_version = "unknown"
+    return f"v{EXTRACTOR_VERSION}-pypdf2-{library_version}"
+
+
+class ExtractionCache:
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = Path(cache_dir or EXTRACTION_CACHE_DIR)
+        self.tag = extractor_tag()
+        self._index = None
+        self.hits = 0
+        self.misses = 0
+
+    def _load_index(self) -> Dict[str, Any]:
+        """Map of path -> size/mtime/hash, so unchanged files skip rehashing"""
+        if self._index is None:
+            try:
+                with open(self.cache_dir / INDEX_FILE, 'r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _save_index(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_dir / (INDEX_FILE + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self.cache_dir / INDEX_FILE)
+
+    def content_hash(self, file_path: str) -> str:
+        """Content hash of a file, reusing the stored one if size and mtime match"""
+        stat = os.stat(file_path)
+        index = self._load_index()
+        key = os.path.abspath(file_path)
+        entry = index.get(key)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256']
+
+        sha = file_sha256(file_path)
+        index[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha}
+        self._save_index()
+        return sha
+
+    def entry_path(self, sha: str) -> Path:
+        return self.cache_dir / f"{sha}-{self.tag}.json.gz"
+
+    def get(self, file_path: str) -> Optional[List[str]]:
+        """Return cached page texts for a file, or None"""
+        path = self.entry_path(self.content_hash(file_path))
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                pages = json.load(f)['pages']
+            self.hits += 1
+            return pages
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+
+    def put(self, file_path: str, pages: List[str]):
+        """Store page texts for a file (written atomically)"""
+        path = self.entry_path(self.content_hash(file_path))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump({'source': file_path, 'extractor': self.tag, 'pages': pages}, f)
+        os.replace(tmp_path, path)
+
+    def pages(self, file_path: str, extract) -> List[str]:
+        """Cached page texts, extracting and storing them on a miss.
+
+        extract returns (pages, complete); a partial extraction is returned
+        but not stored, so one failed parse cannot truncate later builds.
+        """
+        pages = self.get(file_path)
+        if pages is None:
+            pages, complete = extract(file_path)
+            if pages and complete:
+                self.put(file_path, pages)
+        return pages
+
+    def clear(self) -> int:
+        """Remove every cache entry, returning the number of files removed"""
+        if not self.cache_dir.exists():
+            return 0
+        removed = sum(1 for p in self.cache_dir.iterdir() if p.is_file())
+        shutil.rmtree(self.cache_dir)
+        self._index = None
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        entries = list(self.cache_dir.glob("*.json.gz")) if self.cache_dir.exists() else []
+        return {
+            'cache_dir': str(self.cache_dir),
+            'extractor': self.tag,
+            'entries': len(entries),
+            'current_entries': sum(1 for p in entries if p.name.endswith(f"-{self.tag}.json.gz")),
+            'bytes': sum(p.stat().st_size for p in entries)
+        }
+
+
+def warm_cache(data_dir: str = "data", cache_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Extract every PDF under data_dir into the cache"""
+    from utils.file_handlers import extract_pdf_pages
+
+    cache = ExtractionCache(cache_dir)
+    for root, dirs, files in os.walk(data_dir):
+        for file in sorted(files):
+            if os.path.splitext(file)[1].lower() != '.pdf':
+                continue
+            file_path = os.path.join(root, file)
+            pages = cache.pages(file_path, extract_pdf_pages)
+            print(f"✓ Cached: {file_path} ({len(pages)} pages)")
+    print(f"📊 Cache hits: {cache.hits}, extracted: {cache.misses}")
+    return cache.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the PDF text extraction cache")
+    parser.add_argument("command", choices=["warm", "clear", "stats"])
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--cache-dir", default=None)
+    args = parser.parse_args()
+
+    if args.command == "warm":
+        stats = warm_cache(args.data_dir, args.cache_dir)
+    elif args.command == "clear":
+        removed = ExtractionCache(args.cache_dir).clear()
+        print(f"🗑️ Removed {removed} cache files")
+        return
+    else:
+        stats = ExtractionCache(args.cache_dir).stats()
+
+    for key, value in stats.items():
+        print(f"   {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,37 @@
 import os
+import sys
+from pathlib import Path
 from PyPDF2 import PdfReader
 from docx import Document
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
-def load_documents(data_dir: str = "data") -> List[Dict[str, Any]]:
+sys.path.append(str(Path(__file__).parent.parent))
+
+def load_documents(data_dir: str = "data", use_cache: bool = True) -> List[Dict[str, Any]]:
     """
     Load all documents from the data directory and its subdirectories.
-    Supports PDF, TXT, and DOCX files.
+    Supports PDF, TXT, and DOCX files. PDF page text is served from the
+    extraction cache when the file content is unchanged.
     """
     documents = []
+    cache = None
+    if use_cache:
+        from utils.extraction_cache import ExtractionCache
+        cache = ExtractionCache()
     
     for root, dirs, files in os.walk(data_dir):
         for file in files:
             file_path = os.path.join(root, file)
             file_extension = os.path.splitext(file)[1].lower()
             
+            page_offsets = [0]
             try:
                 if file_extension == '.pdf':
-                    content = read_pdf(file_path)
+                    if cache is not None:
+                        pages = cache.pages(file_path, extract_pdf_pages)
+                    else:
+                        pages = read_pdf_pages(file_path)
+                    content, page_offsets = join_pages(pages)
                 elif file_extension == '.txt':
                     content = read_txt(file_path)
                 elif file_extension == '.docx':
@@ -30,7 +44,8 @@ def load_documents(data_dir: str = "data") -> List[Dict[str, Any]]:
                     documents.append({
                         'content': content,
                         'source': file_path,
-                        'type': file_extension
+                        'type': file_extension,
+                        'page_offsets': page_offsets
                     })
                     print(f"✓ Loaded: {file_path}")
                 else:
@@ -40,18 +55,44 @@ def load_documents(data_dir: str = "data") -> List[Dict[str, Any]]:
                 print(f"✗ Error loading {file_path}: {str(e)}")
     
     print(f"\n📊 Total documents loaded: {len(documents)}")
+    if cache is not None and (cache.hits or cache.misses):
+        print(f"🗃️ Extraction cache: {cache.hits} hits, {cache.misses} misses")
     return documents
 
 def read_pdf(file_path: str) -> str:
     """Extract text from PDF files"""
-    text = ""
+    text, _ = join_pages(read_pdf_pages(file_path))
+    return text
+
+def read_pdf_pages(file_path: str) -> List[str]:
+    """Extract the text of each page of a PDF file"""
+    pages, _ = extract_pdf_pages(file_path)
+    return pages
+
+def extract_pdf_pages(file_path: str) -> Tuple[List[str], bool]:
+    """Extract page texts, returning (pages, complete).
+
+    complete is False when parsing failed part-way; pages then holds only
+    the pages read before the error and must not be cached.
+    """
+    pages = []
     try:
         reader = PdfReader(file_path)
         for page in reader.pages:
-            text += page.extract_text() + "\n"
+            pages.append(page.extract_text())
     except Exception as e:
         print(f"Error reading PDF {file_path}: {str(e)}")
-    return text
+        return pages, False
+    return pages, True
+
+def join_pages(pages: List[str]) -> Tuple[str, List[int]]:
+    """Join page texts into one document, returning the character offset of each page"""
+    text = ""
+    offsets = []
+    for page_text in pages:
+        offsets.append(len(text))
+        text += page_text + "\n"
+    return text, offsets or [0]
 
 def read_txt(file_path: str) -> str:
     """Read text from TXT files"""